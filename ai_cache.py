@@ -0,0 +1,142 @@
+"""
+Persistent cache of AI model responses, keyed by a fingerprint of the exact
+prompt and model so unchanged customers cost zero model calls on repeat runs
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 50000
+
+# How many writes happen between expiry/size eviction passes
+EVICTION_INTERVAL = 100
+
+# Keys per SELECT in get_many, well under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+class AIResponseCache:
+    def __init__(self, db_path='ai_cache.db', ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_eviction = 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS ai_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ai_cache_last_accessed ON ai_response_cache(last_accessed)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_id, prompt, max_tokens, namespace=''):
+        """Fingerprint the exact model inputs"""
+        payload = json.dumps([namespace, model_id, max_tokens, prompt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key):
+        """Return the cached response, or None if missing or expired"""
+        now = time.time()
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM ai_response_cache WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self.conn.execute(
+                "UPDATE ai_response_cache SET last_accessed = ? WHERE cache_key = ?",
+                (now, cache_key)
+            )
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def get_many(self, cache_keys):
+        """Look up several keys in one transaction; returns {cache_key: response} for fresh hits"""
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            unique_keys = list(dict.fromkeys(cache_keys))
+            for start in range(0, len(unique_keys), LOOKUP_BATCH_SIZE):
+                batch = unique_keys[start:start + LOOKUP_BATCH_SIZE]
+                found.update(self.conn.execute(
+                    f"""SELECT cache_key, response FROM ai_response_cache
+                        WHERE cache_key IN ({','.join('?' * len(batch))}) AND created_at >= ?""",
+                    (*batch, now - self.ttl_seconds)
+                ).fetchall())
+
+            if found:
+                self.conn.executemany(
+                    "UPDATE ai_response_cache SET last_accessed = ? WHERE cache_key = ?",
+                    [(now, cache_key) for cache_key in found]
+                )
+                self.conn.commit()
+
+            hits = sum(1 for cache_key in cache_keys if cache_key in found)
+            self.hits += hits
+            self.misses += len(cache_keys) - hits
+            return found
+
+    def put(self, cache_key, response):
+        """Store a response, evicting expired and least recently used entries periodically"""
+        now = time.time()
+
+        with self._lock:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO ai_response_cache (cache_key, response, created_at, last_accessed)
+                   VALUES (?, ?, ?, ?)""",
+                (cache_key, response, now, now)
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= EVICTION_INTERVAL:
+                self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        self.conn.execute(
+            "DELETE FROM ai_response_cache WHERE created_at < ?",
+            (now - self.ttl_seconds,)
+        )
+        self.conn.execute(
+            """DELETE FROM ai_response_cache WHERE cache_key IN (
+                   SELECT cache_key FROM ai_response_cache
+                   ORDER BY last_accessed DESC
+                   LIMIT -1 OFFSET ?
+               )""",
+            (self.max_entries,)
+        )
+        self._writes_since_eviction = 0
+
+    def stats(self):
+        """Hit/miss counters since this cache was opened"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        """Close cache connection"""
+        self.conn.close()
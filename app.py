@@ -1,55 +1,239 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context, make_response
 import pandas as pd
 import numpy as np
 import os
-import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import uuid
 import json
-import boto3
+import re
 from botocore.exceptions import ClientError
+from ai_cache import AIResponseCache
+from data_version import read_data_version
+from db_pool import SQLiteConnectionPool
+from response_encoding import configure_json, compress_response
+from bedrock_client import get_bedrock_client, invoke_text_model, governor as bedrock_governor, metrics as bedrock_metrics
 
 app = Flask(__name__)
+configure_json(app)
+
+# Number of customers analysed concurrently by generate_notifications (1 = sequential)
+DEFAULT_MAX_WORKERS = int(os.environ.get('NOTIFICATION_MAX_WORKERS', '8'))
+
+PRIORITY_RANK = {'high': 3, 'medium': 2, 'low': 1}
+
+# Optional pre-screen: customers matching ALL of these thresholds are skipped without a
+# Bedrock call. should_contact_customer contacts anyone the model rates 'high', and these
+# rules cannot rule that out, so screening may drop customers who would have been
+# contacted. Off unless NOTIFICATION_PRESCREEN=1 or prescreen_rules is passed explicitly.
+DEFAULT_PRESCREEN_RULES = {
+    'max_churn_risk': 40,
+    'min_satisfaction': 7,
+    'min_engagement': 50,
+    'max_unresolved_issues': 0,
+    'max_high_urgency_actions': 0
+}
+PRESCREEN_RULES = DEFAULT_PRESCREEN_RULES if os.environ.get('NOTIFICATION_PRESCREEN') == '1' else None
+
+# Columns of an opted-in Value Seeker row, and the history lists _enrich_customers attaches
+CUSTOMER_COLUMNS = {
+    'Customer_ID': 'cp.Customer_ID',
+    'Name': 'cp.Name',
+    'Opted_In': 'cp.Opted_In',
+    'Preferred_Channel': 'cp.Preferred_Channel',
+    'Location': 'cp.Location',
+    'Age': 'cp.Age',
+    'customer_segment': 'cp.customer_segment',
+    'Income_Bracket': 'cp.Income_Bracket',
+    'Customer_Since': 'cp.Customer_Since',
+    'Satisfaction_Score': 'cp.Satisfaction_Score',
+    'Churn_Risk_Score': 'aa.Churn_Risk_Score',
+    'Account_Status': 'aa.Account_Status',
+    'Engagement_Score': 'aa.Engagement_Score',
+    'Subscription_Type': 'aa.Subscription_Type',
+    'Last_Transaction': 'aa.Last_Transaction',
+    'Last_Login': 'aa.Last_Login',
+    'Recent_Activity': 'aa.Recent_Activity',
+    'Account_Tenure_Years': 'aa.Account_Tenure_Years'
+}
+CUSTOMER_HISTORY_FIELDS = ('interactions', 'notification_history', 'recommended_actions')
+
+# /api/customers filters: query parameter -> (SQL condition, value type)
+CUSTOMER_FILTERS = {
+    'min_churn_risk': ('aa.Churn_Risk_Score >= ?', float),
+    'max_churn_risk': ('aa.Churn_Risk_Score <= ?', float),
+    'min_engagement': ('aa.Engagement_Score >= ?', float),
+    'max_engagement': ('aa.Engagement_Score <= ?', float),
+    'location': ('cp.Location = ?', str),
+    'subscription': ('aa.Subscription_Type = ?', str)
+}
+
+# /api/customers page size, and the largest page a caller may ask for
+DEFAULT_CUSTOMER_PAGE_SIZE = 100
+MAX_CUSTOMER_PAGE_SIZE = 1000
+
+# Summary breakdowns of columns only some exports carry: key -> column looked up in
+# customer_profiles, then account_activity. Without the column every customer counts as 'None'.
+OPTIONAL_BREAKDOWN_COLUMNS = {
+    'billing_anomaly': 'Billing_Anomaly',
+    'ownership': 'Solar_EV_Ownership'
+}
+
+# Priority analysis batching (1 = one customer per request); Claude 3 caps output tokens per request
+DEFAULT_PRIORITY_BATCH_SIZE = int(os.environ.get('PRIORITY_BATCH_SIZE', '1'))
+PRIORITY_MAX_TOKENS = 500
+MODEL_MAX_OUTPUT_TOKENS = 4096
+
+# Shared boilerplate of the priority analysis prompt; only the profile section varies per customer
+PRIORITY_PROMPT_RULES = """CRITICAL RULES:
+- Use British English spelling and terminology throughout
+- Focus on actionable insights for customer service teams
+- Provide specific, practical guidance based on actual data patterns
+- Consider Value Seekers characteristics (price-conscious, practical, value-focused)
+- Identify specific trigger factors from the data provided
+- Reference specific dates, interactions, and data points in your analysis"""
+
+PRIORITY_PROMPT_RESPONSE_FORMAT = """Provide your analysis in this EXACT format (ALL FIELDS ARE REQUIRED):
+
+PRIORITY: [HIGH/MEDIUM/LOW]
+URGENCY: [IMMEDIATE/WITHIN_24H/WITHIN_WEEK/ROUTINE]
+RISK_SCORE: [Single number from 1-10 where 10 is highest risk. Examples: 3, 7, 9]
+CONTACT_REASON: [Detailed explanation of why this customer needs contact - what specific issue or opportunity requires attention]
+TRIGGER_FACTORS: [MANDATORY FIELD - You MUST provide specific data points from the customer profile that triggered this recommendation. Be very specific with actual numbers and dates. Examples: "Churn risk 85% + satisfaction score 2/10 + last login 45 days ago", "3 unresolved billing complaints since January + engagement score 12%", "5 unopened payment reminders + previous late payment history", "Account tenure 4 years but satisfaction dropped from 8 to 3 in last quarter"]
+POTENTIAL_IMPACT: [What could happen if this customer isn't contacted - business impact]
+
+CUSTOMER_INSIGHTS: [Personality traits, motivations, and communication preferences based on Value Seekers profile and actual behavior data]
+COMMUNICATION_STYLE: [Recommended tone and approach - direct/empathetic/technical/consultative]
+CONVERSATION_STARTERS: [Specific opening lines or key points to mention when contacting]"""
+
+PRIORITY_PROMPT_GUIDANCE = """CRITICAL REQUIREMENTS:
+1. TRIGGER_FACTORS is MANDATORY - You MUST analyze the customer data and identify specific trigger factors
+2. Use actual data points from the customer profile (churn risk %, satisfaction scores, interaction dates, etc.)
+3. Be specific with numbers, percentages, and timeframes
+4. If no obvious triggers exist, state "Routine review cycle - no immediate risk factors identified"
+5. NEVER leave TRIGGER_FACTORS empty or use generic placeholder text
+
+TRIGGER FACTOR EXAMPLES TO FOLLOW:
+- "Churn risk 78% + satisfaction score 3/10 + 2 unresolved billing issues"
+- "Engagement score 18% + 6 unopened notifications in last month + last login 21 days ago"
+- "Previous payment difficulties in Q1 + upcoming billing cycle + income bracket: Low"
+- "Account status: At Risk + 3 negative sentiment interactions + no recent activity"
+
+PROACTIVE ENGAGEMENT STRATEGY:
+Focus on preventing issues before they escalate, especially for Value Seekers who are price-sensitive:
+
+PROACTIVE BILLING SUPPORT:
+- Previous billing issues + upcoming billing cycle = proactive payment support
+- Payment difficulties in past + current financial stress indicators = early intervention
+- High usage patterns + Value Seekers segment = proactive cost management advice
+- Seasonal usage changes + budget concerns = advance planning support
+
+RETENTION PREVENTION:
+- Early warning signs (satisfaction dropping, engagement declining) = proactive value demonstration
+- Contract renewal approaching + any service issues = retention conversation
+- Competitor activity in area + customer concerns = proactive competitive response
+- Service quality issues + Value Seekers expectations = immediate resolution focus
+
+COMPREHENSIVE TRIGGER FACTOR ANALYSIS:
+- Churn Risk Factors: High churn risk (>70%), "At Risk" status, low satisfaction scores (<5)
+- Engagement Issues: Low engagement (<30%), unopened notifications (>70%), no recent logins
+- Service Issues: Unresolved complaints, billing problems, negative sentiment interactions
+- Behavioral Changes: Reduced activity, unsubscribe requests, failed notification deliveries
+- Proactive Opportunities: Previous payment struggles + upcoming bills, seasonal usage changes
+- Value Demonstration: High-value customers with declining satisfaction, cost concerns
+- Urgency Escalators: Multiple unresolved issues, high urgency recommended actions, recent complaints
+- Value Seekers Specific: Income bracket vs subscription mismatch, payment-related interactions
+- Retention Risks: Multiple negative interactions, unsubscribe requests, dormant accounts
+
+PROACTIVE PRIORITY GUIDELINES:
+- HIGH: Churn risk >70% OR previous billing struggles + upcoming cycle OR satisfaction <3 OR multiple unresolved issues
+- MEDIUM: Churn risk 40-70% OR declining engagement trends OR seasonal usage concerns OR proactive value opportunities
+- LOW: Stable metrics with proactive relationship building OR seasonal check-ins OR value reinforcement
+
+PROACTIVE MESSAGING FOCUS:
+- Reach out BEFORE problems occur (pre-bill support, seasonal advice, usage alerts)
+- Address Value Seekers concerns about costs BEFORE they become complaints
+- Provide solutions and support BEFORE customers ask for help
+- Demonstrate ongoing value BEFORE satisfaction drops
+
+Use British English throughout (realise, organised, prioritise, centre, colour)."""
 
 class BedrockNotificationGenerator:
-    def __init__(self):
+    def __init__(self, cache=None):
         """Initialize Bedrock client"""
+        self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+        self.cache = cache
         try:
-            self.bedrock_client = boto3.client(
-                'bedrock-runtime',
-                region_name='us-east-1'
-            )
-            self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+            self.bedrock_client = get_bedrock_client()
         except Exception as e:
             print(f"Warning: Could not initialize Bedrock client: {e}")
             self.bedrock_client = None
     
+    def _invoke(self, prompt, max_tokens):
+        """Invoke the model, serving identical prompts from the response cache when available"""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.model_id, prompt, max_tokens)
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        
+        ai_response = invoke_text_model(self.bedrock_client, self.model_id, prompt, max_tokens)
+        
+        if self.cache is not None:
+            self.cache.put(cache_key, ai_response)
+        
+        return ai_response
+    
     def analyse_customer_priority(self, customer_data):
         """Use AI to determine customer contact priority and strategy with proactive approach"""
         prompt = self._build_priority_prompt(customer_data)
+        ai_response = self._invoke(prompt, max_tokens=PRIORITY_MAX_TOKENS)
         
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 500,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        })
+        return self._parse_priority_response(ai_response)
+    
+    def analyse_customers_priority_batch(self, customers):
+        """Analyse several customers with a single request
         
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=body
-        )
+        Returns a list aligned with customers. Entries are None where the response had
+        no usable block for that customer, so callers can fall back to a single call.
+        """
+        prompt = self._build_batch_priority_prompt(customers)
+        max_tokens = min(PRIORITY_MAX_TOKENS * len(customers), MODEL_MAX_OUTPUT_TOKENS)
+        ai_response = self._invoke(prompt, max_tokens=max_tokens)
         
-        response_body = json.loads(response['body'].read())
-        ai_response = response_body['content'][0]['text'].strip()
+        blocks = self._split_batch_response(ai_response)
+        results = []
+        for customer in customers:
+            block = blocks.get(str(customer.get('Customer_ID')))
+            if block and 'PRIORITY' in block.upper():
+                results.append(self._parse_priority_response(block))
+            else:
+                print(f"⚠️ No batched analysis for customer {customer.get('Customer_ID')}")
+                results.append(None)
         
-        return self._parse_priority_response(ai_response)
+        return results
     
     def _build_priority_prompt(self, customer_data):
         """Build comprehensive prompt for AI priority analysis using all available data"""
+        prompt = f"""
+You are an AI customer engagement strategist for ScottishPower. Analyze this Value Seekers customer using comprehensive data from all systems and provide detailed insights for customer service agents.
+
+{PRIORITY_PROMPT_RULES}
+
+{self._build_priority_profile_section(customer_data)}
+
+{PRIORITY_PROMPT_RESPONSE_FORMAT}
+
+{PRIORITY_PROMPT_GUIDANCE}
+"""
+        #print(prompt)
+        return prompt
+    
+    def _build_priority_profile_section(self, customer_data):
+        """Build the customer-specific part of the priority prompt"""
         # Basic customer info
         churn_risk = customer_data.get('Churn_Risk_Score', 0)
         engagement = customer_data.get('Engagement_Score', 50)
@@ -108,18 +292,7 @@ class BedrockNotificationGenerator:
             detail += f"\n     Urgency: {action.get('Urgency_Level', 'Unknown')} | Follow-up: {action.get('Follow_Up_Required', 'Unknown')} | Team: {action.get('Assigned_Team', 'Unknown')}"
             action_details.append(detail)
         
-        prompt = f"""
-You are an AI customer engagement strategist for ScottishPower. Analyze this Value Seekers customer using comprehensive data from all systems and provide detailed insights for customer service agents.
-
-CRITICAL RULES:
-- Use British English spelling and terminology throughout
-- Focus on actionable insights for customer service teams
-- Provide specific, practical guidance based on actual data patterns
-- Consider Value Seekers characteristics (price-conscious, practical, value-focused)
-- Identify specific trigger factors from the data provided
-- Reference specific dates, interactions, and data points in your analysis
-
-=== CUSTOMER PROFILE: {customer_data.get('Name', 'Unknown')} (ID: {customer_data.get('Customer_ID', 'Unknown')}) ===
+        return f"""=== CUSTOMER PROFILE: {customer_data.get('Name', 'Unknown')} (ID: {customer_data.get('Customer_ID', 'Unknown')}) ===
 
 BASIC INFORMATION:
 - Customer Name: {customer_data.get('Name', 'Unknown')}
@@ -158,76 +331,39 @@ VALUE SEEKERS SEGMENT CHARACTERISTICS:
 - Respond well to cost savings and clear value propositions
 - Prefer straightforward, no-nonsense communication
 - Income level ({income_bracket}) affects price sensitivity and switching likelihood
-- Tenure ({account_tenure} years) indicates {"strong" if account_tenure > 3 else "moderate" if account_tenure > 1 else "new"} relationship with ScottishPower
-
-Provide your analysis in this EXACT format (ALL FIELDS ARE REQUIRED):
-
-PRIORITY: [HIGH/MEDIUM/LOW]
-URGENCY: [IMMEDIATE/WITHIN_24H/WITHIN_WEEK/ROUTINE]
-RISK_SCORE: [Single number from 1-10 where 10 is highest risk. Examples: 3, 7, 9]
-CONTACT_REASON: [Detailed explanation of why this customer needs contact - what specific issue or opportunity requires attention]
-TRIGGER_FACTORS: [MANDATORY FIELD - You MUST provide specific data points from the customer profile that triggered this recommendation. Be very specific with actual numbers and dates. Examples: "Churn risk 85% + satisfaction score 2/10 + last login 45 days ago", "3 unresolved billing complaints since January + engagement score 12%", "5 unopened payment reminders + previous late payment history", "Account tenure 4 years but satisfaction dropped from 8 to 3 in last quarter"]
-POTENTIAL_IMPACT: [What could happen if this customer isn't contacted - business impact]
-
-CUSTOMER_INSIGHTS: [Personality traits, motivations, and communication preferences based on Value Seekers profile and actual behavior data]
-COMMUNICATION_STYLE: [Recommended tone and approach - direct/empathetic/technical/consultative]
-CONVERSATION_STARTERS: [Specific opening lines or key points to mention when contacting]
-
-CRITICAL REQUIREMENTS:
-1. TRIGGER_FACTORS is MANDATORY - You MUST analyze the customer data and identify specific trigger factors
-2. Use actual data points from the customer profile (churn risk %, satisfaction scores, interaction dates, etc.)
-3. Be specific with numbers, percentages, and timeframes
-4. If no obvious triggers exist, state "Routine review cycle - no immediate risk factors identified"
-5. NEVER leave TRIGGER_FACTORS empty or use generic placeholder text
-
-TRIGGER FACTOR EXAMPLES TO FOLLOW:
-- "Churn risk 78% + satisfaction score 3/10 + 2 unresolved billing issues"
-- "Engagement score 18% + 6 unopened notifications in last month + last login 21 days ago"
-- "Previous payment difficulties in Q1 + upcoming billing cycle + income bracket: Low"
-- "Account status: At Risk + 3 negative sentiment interactions + no recent activity"
+- Tenure ({account_tenure} years) indicates {"strong" if account_tenure > 3 else "moderate" if account_tenure > 1 else "new"} relationship with ScottishPower"""
+    
+    def _build_batch_priority_prompt(self, customers):
+        """Build one priority prompt covering several customers, sharing the boilerplate"""
+        profiles = "\n\n".join(self._build_priority_profile_section(customer) for customer in customers)
+        
+        prompt = f"""
+You are an AI customer engagement strategist for ScottishPower. Analyze each of the following {len(customers)} Value Seekers customers independently using comprehensive data from all systems and provide detailed insights for customer service agents.
 
-PROACTIVE ENGAGEMENT STRATEGY:
-Focus on preventing issues before they escalate, especially for Value Seekers who are price-sensitive:
+{PRIORITY_PROMPT_RULES}
 
-PROACTIVE BILLING SUPPORT:
-- Previous billing issues + upcoming billing cycle = proactive payment support
-- Payment difficulties in past + current financial stress indicators = early intervention
-- High usage patterns + Value Seekers segment = proactive cost management advice
-- Seasonal usage changes + budget concerns = advance planning support
+{profiles}
 
-RETENTION PREVENTION:
-- Early warning signs (satisfaction dropping, engagement declining) = proactive value demonstration
-- Contract renewal approaching + any service issues = retention conversation
-- Competitor activity in area + customer concerns = proactive competitive response
-- Service quality issues + Value Seekers expectations = immediate resolution focus
+Provide one analysis per customer, in the same order as the profiles above. Wrap each analysis in delimiter lines using the customer's ID exactly like this:
 
-COMPREHENSIVE TRIGGER FACTOR ANALYSIS:
-- Churn Risk Factors: High churn risk (>70%), "At Risk" status, low satisfaction scores (<5)
-- Engagement Issues: Low engagement (<30%), unopened notifications (>70%), no recent logins
-- Service Issues: Unresolved complaints, billing problems, negative sentiment interactions
-- Behavioral Changes: Reduced activity, unsubscribe requests, failed notification deliveries
-- Proactive Opportunities: Previous payment struggles + upcoming bills, seasonal usage changes
-- Value Demonstration: High-value customers with declining satisfaction, cost concerns
-- Urgency Escalators: Multiple unresolved issues, high urgency recommended actions, recent complaints
-- Value Seekers Specific: Income bracket vs subscription mismatch, payment-related interactions
-- Retention Risks: Multiple negative interactions, unsubscribe requests, dormant accounts
+### CUSTOMER <ID> START ###
+(analysis for that customer only)
+### CUSTOMER <ID> END ###
 
-PROACTIVE PRIORITY GUIDELINES:
-- HIGH: Churn risk >70% OR previous billing struggles + upcoming cycle OR satisfaction <3 OR multiple unresolved issues
-- MEDIUM: Churn risk 40-70% OR declining engagement trends OR seasonal usage concerns OR proactive value opportunities
-- LOW: Stable metrics with proactive relationship building OR seasonal check-ins OR value reinforcement
+{PRIORITY_PROMPT_RESPONSE_FORMAT}
 
-PROACTIVE MESSAGING FOCUS:
-- Reach out BEFORE problems occur (pre-bill support, seasonal advice, usage alerts)
-- Address Value Seekers concerns about costs BEFORE they become complaints
-- Provide solutions and support BEFORE customers ask for help
-- Demonstrate ongoing value BEFORE satisfaction drops
-
-Use British English throughout (realise, organised, prioritise, centre, colour).
+{PRIORITY_PROMPT_GUIDANCE}
 """
-        #print(prompt)
         return prompt
     
+    def _split_batch_response(self, ai_response):
+        """Split a batched response into per-customer blocks keyed by customer ID"""
+        blocks = {}
+        pattern = r'###\s*CUSTOMER\s+(\d+)\s+START\s*###(.*?)###\s*CUSTOMER\s+\1\s+END\s*###'
+        for customer_id, block in re.findall(pattern, ai_response, re.DOTALL | re.IGNORECASE):
+            blocks[customer_id] = block.strip()
+        return blocks
+    
     def _parse_priority_response(self, ai_response):
         """Parse AI response into structured data"""
         try:
@@ -352,24 +488,7 @@ Use British English throughout (realise, organised, prioritise, centre, colour).
         """Generate personalized engagement message using AI"""
         prompt = self._build_message_prompt(customer_data, priority_analysis, message_type)
         
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 200,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        })
-        
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=body
-        )
-        
-        response_body = json.loads(response['body'].read())
-        return response_body['content'][0]['text'].strip()
+        return self._invoke(prompt, max_tokens=200)
     
     def _build_message_prompt(self, customer_data, priority_analysis, message_type):
         """Build enhanced prompt for message generation with detailed customer context"""
@@ -460,75 +579,253 @@ Generate ONLY the personalized message text, no explanations or additional conte
     
 
 class SmartNotificationEngine:
-    def __init__(self, db_path='customer_data.db'):
+    def __init__(self, db_path='customer_data.db', max_workers=DEFAULT_MAX_WORKERS, use_ai_cache=True,
+                 prescreen_rules=PRESCREEN_RULES, priority_batch_size=DEFAULT_PRIORITY_BATCH_SIZE):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.max_workers = max_workers
+        self.priority_batch_size = max(1, priority_batch_size)
+        self.prescreen_rules = prescreen_rules
+        # Read-only pooled connections, so request threads and workers query in parallel
+        self.db_pool = SQLiteConnectionPool(db_path, read_only=True)
+        
+        # AI responses are cached in a sidecar database next to the customer data
+        self.ai_cache = None
+        if use_ai_cache:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'ai_cache.db')
+            self.ai_cache = AIResponseCache(cache_path)
+    
+    def close(self):
+        """Close pooled database connections and the AI cache"""
+        self.db_pool.close()
+        if self.ai_cache:
+            self.ai_cache.close()
     
     def get_opted_in_value_seekers(self):
         """Get Value Seekers customers with comprehensive data from all tables"""
-        query = """
+        customers = self._query_value_seekers(list(CUSTOMER_COLUMNS))
+        
+        # Enrich with interaction, notification and action history in bulk
+        self._enrich_customers(customers)
+        
+        return customers
+    
+    def get_customers_page(self, after=None, limit=DEFAULT_CUSTOMER_PAGE_SIZE, fields=None, filters=None):
+        """One page of opted-in Value Seekers in Customer_ID order
+        
+        after is the previous page's next_cursor. fields limits the keys returned
+        (Customer_ID is always included) and only the requested histories are loaded.
+        filters maps CUSTOMER_FILTERS names to values and is applied in SQL. A limit of
+        None returns every match in one page.
+        Returns (customers, next_cursor), where next_cursor is None on the last page.
+        Raises ValueError for unknown fields or filters and malformed filter values.
+        """
+        fields = list(fields) if fields else list(CUSTOMER_COLUMNS) + list(CUSTOMER_HISTORY_FIELDS)
+        filters = filters or {}
+        
+        unknown_fields = set(fields) - set(CUSTOMER_COLUMNS) - set(CUSTOMER_HISTORY_FIELDS)
+        if unknown_fields:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+        unknown_filters = set(filters) - set(CUSTOMER_FILTERS)
+        if unknown_filters:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown_filters))}")
+        
+        columns = ['Customer_ID'] + [field for field in fields if field in CUSTOMER_COLUMNS and field != 'Customer_ID']
+        conditions = [CUSTOMER_FILTERS[name][0] for name in filters]
+        params = [CUSTOMER_FILTERS[name][1](value) for name, value in filters.items()]
+        if after is not None:
+            conditions.append('cp.Customer_ID > ?')
+            params.append(after)
+        
+        # One extra row tells whether another page follows
+        customers = self._query_value_seekers(columns, conditions, params,
+                                              limit=limit + 1 if limit is not None else None)
+        next_cursor = None
+        if limit is not None and len(customers) > limit:
+            customers = customers[:limit]
+            next_cursor = customers[-1]['Customer_ID']
+        
+        self._enrich_customers(customers, include=[field for field in CUSTOMER_HISTORY_FIELDS if field in fields])
+        
+        return customers, next_cursor
+    
+    def _query_value_seekers(self, columns, conditions=(), params=(), limit=None):
+        """Fetch the given CUSTOMER_COLUMNS of opted-in Value Seekers in Customer_ID order"""
+        select_list = ',\n            '.join(f'{CUSTOMER_COLUMNS[column]} AS {column}' for column in columns)
+        query = f"""
         SELECT 
-            cp.Customer_ID,
-            cp.Name,
-            cp.Opted_In,
-            cp.Preferred_Channel,
-            cp.Location,
-            cp.Age,
-            cp.customer_segment,
-            cp.Income_Bracket,
-            cp.Customer_Since,
-            cp.Satisfaction_Score,
-            aa.Churn_Risk_Score,
-            aa.Account_Status,
-            aa.Engagement_Score,
-            aa.Subscription_Type,
-            aa.Last_Transaction,
-            aa.Last_Login,
-            aa.Recent_Activity,
-            aa.Account_Tenure_Years
+            {select_list}
         FROM customer_profiles cp
         LEFT JOIN account_activity aa ON cp.Customer_ID = aa.Customer_ID
         WHERE cp.customer_segment = 'Value Seekers' 
         AND cp.Opted_In = 'Yes'
+        {''.join(f'AND {condition} ' for condition in conditions)}
+        ORDER BY cp.Customer_ID
         """
+        if limit is not None:
+            query += "LIMIT ?"
+            params = [*params, limit]
         
-        cursor = self.conn.execute(query)
-        customers = []
-        columns = [desc[0] for desc in cursor.description]
+        with self.db_pool.connection() as conn:
+            cursor = conn.execute(query, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def get_value_seeker_summary(self):
+        """Counts, averages and breakdowns of opted-in Value Seekers, aggregated in SQL
         
-        for row in cursor.fetchall():
-            customer = dict(zip(columns, row))
-            
-            # Enrich with interaction history
-            customer['interactions'] = self._get_recent_interactions(customer['Customer_ID'])
-            
-            # Enrich with notification history
-            customer['notification_history'] = self._get_notification_history(customer['Customer_ID'])
-            
-            # Enrich with recommended actions
-            customer['recommended_actions'] = self._get_recommended_actions(customer['Customer_ID'])
-            
-            customers.append(customer)
+        Only customer_profiles and account_activity are read, so the cost does not
+        grow with the history tables. Averages are unrounded.
+        """
+        with self.db_pool.connection() as conn:
+            optional_columns = self._optional_breakdown_columns(conn)
+        
+        value_seekers = f"""
+        WITH value_seekers AS (
+            SELECT cp.Age, cp.Location, cp.Income_Bracket,
+                   aa.Subscription_Type, aa.Engagement_Score, aa.Churn_Risk_Score,
+                   {', '.join(f'{expression} AS {key}' for key, expression in optional_columns.items())}
+            FROM customer_profiles cp
+            LEFT JOIN account_activity aa ON cp.Customer_ID = aa.Customer_ID
+            WHERE cp.customer_segment = 'Value Seekers'
+            AND cp.Opted_In = 'Yes'
+        )
+        """
+        totals_query = value_seekers + """
+        SELECT COUNT(*), AVG(Age), AVG(Engagement_Score), AVG(Churn_Risk_Score)
+        FROM value_seekers
+        """
+        breakdown_query = value_seekers + """
+        SELECT 'subscription', COALESCE(Subscription_Type, 'Unknown'), COUNT(*) FROM value_seekers GROUP BY 2
+        UNION ALL
+        SELECT 'location', COALESCE(Location, 'Unknown'), COUNT(*) FROM value_seekers GROUP BY 2
+        UNION ALL
+        SELECT 'income', COALESCE(Income_Bracket, 'Unknown'), COUNT(*) FROM value_seekers GROUP BY 2
+        UNION ALL
+        SELECT 'billing_anomaly', COALESCE(billing_anomaly, 'None'), COUNT(*) FROM value_seekers GROUP BY 2
+        UNION ALL
+        SELECT 'ownership', COALESCE(ownership, 'None'), COUNT(*) FROM value_seekers GROUP BY 2
+        ORDER BY 1, 3 DESC, 2
+        """
+        
+        with self.db_pool.connection() as conn:
+            total_count, avg_age, avg_engagement, avg_churn_risk = conn.execute(totals_query).fetchone()
+            breakdown_rows = conn.execute(breakdown_query).fetchall()
+        
+        breakdowns = {'subscription': {}, 'location': {}, 'income': {}, 'billing_anomaly': {}, 'ownership': {}}
+        for dimension, value, count in breakdown_rows:
+            breakdowns[dimension][value] = count
+        
+        return {
+            'total_count': total_count,
+            'avg_age': avg_age or 0,
+            'avg_engagement_score': avg_engagement or 0,
+            'avg_churn_risk': avg_churn_risk or 0,
+            'subscription_breakdown': breakdowns['subscription'],
+            'location_breakdown': breakdowns['location'],
+            'income_breakdown': breakdowns['income'],
+            'billing_anomaly_breakdown': breakdowns['billing_anomaly'],
+            'ownership_breakdown': breakdowns['ownership']
+        }
+    
+    def _optional_breakdown_columns(self, conn):
+        """SQL expression for each OPTIONAL_BREAKDOWN_COLUMNS key, NULL where no table has the column"""
+        table_columns = {
+            alias: {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for alias, table in (('cp', 'customer_profiles'), ('aa', 'account_activity'))
+        }
+        expressions = {}
+        for key, column in OPTIONAL_BREAKDOWN_COLUMNS.items():
+            alias = next((alias for alias, columns in table_columns.items() if column in columns), None)
+            expressions[key] = f'{alias}.[{column}]' if alias else 'NULL'
+        return expressions
+    
+    def _enrich_customers(self, customers, limit=5, include=CUSTOMER_HISTORY_FIELDS):
+        """Attach recent interactions, notifications and actions using one query per table
+        
+        include names the CUSTOMER_HISTORY_FIELDS to load; the others are left out.
+        """
+        customer_ids = json.dumps([customer['Customer_ID'] for customer in customers])
+        history_queries = {
+            'interactions': ("""
+        SELECT Customer_ID, Interaction_Type, Sentiment, Summary, Resolution_Status, Channel,
+               interaction_date
+        FROM (
+            SELECT Customer_ID, Interaction_Type, Sentiment, Summary, Resolution_Status, Channel,
+                   Interaction_Timestamp as interaction_date,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY Customer_ID ORDER BY Interaction_Timestamp DESC
+                   ) as row_num
+            FROM interaction_history
+            WHERE Customer_ID IN (SELECT value FROM json_each(?))
+        )
+        WHERE row_num <= ?
+        ORDER BY Customer_ID, row_num
+        """, (customer_ids, limit)),
+            'notification_history': ("""
+        SELECT Customer_ID, Notification_Type, Opened, Clicked, Action_Taken,
+               Delivery_Status, Notification_Priority, Response_Time_Hours,
+               sent_date
+        FROM (
+            SELECT Customer_ID, Notification_Type, Opened, Clicked, Action_Taken,
+                   Delivery_Status, Notification_Priority, Response_Time_Hours,
+                   Sent_Timestamp as sent_date,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY Customer_ID ORDER BY Sent_Timestamp DESC
+                   ) as row_num
+            FROM notification_history
+            WHERE Customer_ID IN (SELECT value FROM json_each(?))
+        )
+        WHERE row_num <= ?
+        ORDER BY Customer_ID, row_num
+        """, (customer_ids, limit)),
+            'recommended_actions': ("""
+        SELECT Customer_ID, Scenario, Recommended_Action, Urgency_Level,
+               Follow_Up_Required, Assigned_Team
+        FROM recommended_actions
+        WHERE Customer_ID IN (SELECT value FROM json_each(?))
+        ORDER BY Customer_ID, rowid
+        """, (customer_ids,))
+        }
+        
+        for field in include:
+            query, params = history_queries[field]
+            histories = self._fetch_grouped_by_customer(query, params) if customers else {}
+            for customer in customers:
+                customer[field] = histories.get(customer['Customer_ID'], [])
         
         return customers
     
+    def _fetch_grouped_by_customer(self, query, params):
+        """Run a query whose first column is Customer_ID and group the remaining columns per customer"""
+        with self.db_pool.connection() as conn:
+            cursor = conn.execute(query, params)
+            columns = [desc[0] for desc in cursor.description][1:]
+            rows = cursor.fetchall()
+        
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(dict(zip(columns, row[1:])))
+        
+        return grouped
+    
     def _get_recent_interactions(self, customer_id, limit=5):
         """Get recent interactions for a customer"""
         query = """
         SELECT Interaction_Type, Sentiment, Summary, Resolution_Status, Channel,
-               datetime([Date & Time]) as interaction_date
+               Interaction_Timestamp as interaction_date
         FROM interaction_history 
         WHERE Customer_ID = ? 
-        ORDER BY datetime([Date & Time]) DESC 
+        ORDER BY Interaction_Timestamp DESC 
         LIMIT ?
         """
         
-        cursor = self.conn.execute(query, (customer_id, limit))
-        interactions = []
-        columns = [desc[0] for desc in cursor.description]
+        with self.db_pool.connection() as conn:
+            cursor = conn.execute(query, (customer_id, limit))
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         
-        for row in cursor.fetchall():
+        interactions = []
+        for row in rows:
             interactions.append(dict(zip(columns, row)))
         
         return interactions
@@ -538,18 +835,20 @@ class SmartNotificationEngine:
         query = """
         SELECT Notification_Type, Opened, Clicked, Action_Taken, 
                Delivery_Status, Notification_Priority, Response_Time_Hours,
-               datetime(Sent_Date) as sent_date
+               Sent_Timestamp as sent_date
         FROM notification_history 
         WHERE Customer_ID = ? 
-        ORDER BY datetime(Sent_Date) DESC 
+        ORDER BY Sent_Timestamp DESC 
         LIMIT ?
         """
         
-        cursor = self.conn.execute(query, (customer_id, limit))
-        notifications = []
-        columns = [desc[0] for desc in cursor.description]
+        with self.db_pool.connection() as conn:
+            cursor = conn.execute(query, (customer_id, limit))
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         
-        for row in cursor.fetchall():
+        notifications = []
+        for row in rows:
             notifications.append(dict(zip(columns, row)))
         
         return notifications
@@ -563,15 +862,50 @@ class SmartNotificationEngine:
         WHERE Customer_ID = ?
         """
         
-        cursor = self.conn.execute(query, (customer_id,))
-        actions = []
-        columns = [desc[0] for desc in cursor.description]
+        with self.db_pool.connection() as conn:
+            cursor = conn.execute(query, (customer_id,))
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         
-        for row in cursor.fetchall():
+        actions = []
+        for row in rows:
             actions.append(dict(zip(columns, row)))
         
         return actions
     
+    def prescreen_customers(self, customers):
+        """Split customers into model candidates and clear non-candidates using vectorised rules"""
+        if not self.prescreen_rules or not customers:
+            return customers, []
+        
+        rules = self.prescreen_rules
+        frame = pd.DataFrame({
+            'churn_risk': [c.get('Churn_Risk_Score') for c in customers],
+            'satisfaction': [c.get('Satisfaction_Score') for c in customers],
+            'engagement': [c.get('Engagement_Score') for c in customers],
+            'unresolved_issues': [
+                sum(1 for i in c.get('interactions', []) if i.get('Resolution_Status') in ['Pending', 'Escalated'])
+                for c in customers
+            ],
+            'high_urgency_actions': [
+                sum(1 for a in c.get('recommended_actions', []) if a.get('Urgency_Level') == 'High')
+                for c in customers
+            ]
+        }).apply(pd.to_numeric, errors='coerce')
+        
+        # Missing values compare as False, so customers with incomplete data stay candidates
+        clear_non_candidate = (
+            (frame['churn_risk'] <= rules['max_churn_risk'])
+            & (frame['satisfaction'] >= rules['min_satisfaction'])
+            & (frame['engagement'] >= rules['min_engagement'])
+            & (frame['unresolved_issues'] <= rules['max_unresolved_issues'])
+            & (frame['high_urgency_actions'] <= rules['max_high_urgency_actions'])
+        ).to_numpy()
+        
+        candidates = [c for c, skip in zip(customers, clear_non_candidate) if not skip]
+        screened_out = [c for c, skip in zip(customers, clear_non_candidate) if skip]
+        return candidates, screened_out
+    
     def should_contact_customer(self, customer, priority_analysis):
         """Decide if customer should be contacted"""
         priority = priority_analysis.get('priority', 'low')
@@ -648,10 +982,76 @@ class SmartNotificationEngine:
             'timestamp': datetime.now().isoformat()
         }
     
-    def generate_notifications(self):
-        """Main method to generate all notifications"""
-        notifications = []
-        bedrock_generator = BedrockNotificationGenerator()
+    def process_customer(self, bedrock_generator, customer, priority_analysis=None):
+        """Run the AI workflow for one customer, returning a notification or None
+        
+        priority_analysis may be passed in when a batched request already produced it.
+        """
+        try:
+            customer_id = customer['Customer_ID']
+            customer_name = customer['Name']
+            print(f"🔍 Processing {customer_name} (ID: {customer_id})")
+            
+            # AI Priority Analysis
+            if priority_analysis is None:
+                priority_analysis = bedrock_generator.analyse_customer_priority(customer)
+            
+            # Decide if we should contact
+            if not self.should_contact_customer(customer, priority_analysis):
+                print(f"  ⏭️ Skipping {customer_name} - no urgent need for contact")
+                return None
+            
+            # Determine message type
+            message_type = self.determine_message_type(customer, priority_analysis)
+            
+            # Generate message
+            message = bedrock_generator.generate_engagement_message(customer, priority_analysis, message_type)
+            
+            # Assemble notification
+            notification = self.assemble_notification(customer, priority_analysis, message, message_type)
+            
+            print(f"  ✅ Created {priority_analysis['priority']} priority notification for {customer_name}")
+            return notification
+            
+        except Exception as e:
+            print(f"  ❌ Error processing customer {customer.get('Customer_ID', 'Unknown')}: {e}")
+            return None
+    
+    def process_customer_batch(self, bedrock_generator, customers):
+        """Run the AI workflow for a batch of customers, sharing one priority analysis request"""
+        if len(customers) == 1:
+            return [self.process_customer(bedrock_generator, customers[0])]
+        
+        try:
+            analyses = bedrock_generator.analyse_customers_priority_batch(customers)
+        except Exception as e:
+            print(f"  ❌ Batched priority analysis failed, falling back to single calls: {e}")
+            analyses = [None] * len(customers)
+        
+        # Customers without a batched result are analysed individually
+        return [
+            self.process_customer(bedrock_generator, customer, priority_analysis)
+            for customer, priority_analysis in zip(customers, analyses)
+        ]
+    
+    def sort_notifications(self, notifications):
+        """Sort by priority and risk, highest first, with Customer_ID as a stable tie-break"""
+        return sorted(notifications, key=lambda x: (
+            -PRIORITY_RANK.get(x['priority'], 1),
+            -x['risk_score'],
+            x['customer_id']
+        ))
+    
+    def iter_notifications(self, max_workers=None, run_stats=None):
+        """Yield (processed, total, notification) as each customer completes
+        
+        The first item is (0, total, None) once the customers are loaded; notification
+        is None for skipped or failed customers. Items arrive in completion order, so
+        callers should use sort_notifications for the final ordering. If run_stats is a
+        dict, this run's customer and pre-screen counts are written into it.
+        """
+        workers = max_workers or self.max_workers
+        bedrock_generator = BedrockNotificationGenerator(cache=self.ai_cache)
         
         print("🤖 Starting simplified notification workflow...")
         
@@ -659,52 +1059,210 @@ class SmartNotificationEngine:
         customers = self.get_opted_in_value_seekers()
         print(f"🎯 Found {len(customers)} opted-in Value Seekers customers")
         
-        # Process each customer
-        for customer in customers:
+        # Drop customers who can never be contacted before paying for a model call
+        customers, screened_out = self.prescreen_customers(customers)
+        if run_stats is not None:
+            run_stats.update({
+                'customers': len(customers) + len(screened_out),
+                'prescreened_out': len(screened_out),
+                'model_calls_saved': len(screened_out)
+            })
+        if screened_out:
+            print(f"💰 Pre-screen skipped {len(screened_out)} low-risk customers, saving {len(screened_out)} model calls")
+        
+        total = len(customers)
+        yield 0, total, None
+        
+        batch_size = self.priority_batch_size
+        batches = [customers[i:i + batch_size] for i in range(0, total, batch_size)]
+        if batch_size > 1:
+            print(f"📦 Batching priority analysis: {batch_size} customers per request")
+        
+        # Process customers; each one is isolated so a failure only drops that customer
+        processed = 0
+        if workers > 1 and len(batches) > 1:
+            print(f"⚡ Processing with {workers} concurrent workers")
+            executor = ThreadPoolExecutor(max_workers=workers)
             try:
-                customer_id = customer['Customer_ID']
-                customer_name = customer['Name']
-                print(f"🔍 Processing {customer_name} (ID: {customer_id})")
-                
-                # AI Priority Analysis
-                priority_analysis = bedrock_generator.analyse_customer_priority(customer)
-                
-                # Decide if we should contact
-                if not self.should_contact_customer(customer, priority_analysis):
-                    print(f"  ⏭️ Skipping {customer_name} - no urgent need for contact")
-                    continue
-                
-                # Determine message type
-                message_type = self.determine_message_type(customer, priority_analysis)
-                
-                # Generate message
-                message = bedrock_generator.generate_engagement_message(customer, priority_analysis, message_type)
-                
-                # Assemble notification
-                notification = self.assemble_notification(customer, priority_analysis, message, message_type)
+                futures = [
+                    executor.submit(self.process_customer_batch, bedrock_generator, batch)
+                    for batch in batches
+                ]
+                for future in as_completed(futures):
+                    for notification in future.result():
+                        processed += 1
+                        yield processed, total, notification
+            finally:
+                # Stop queued customers if the consumer goes away early (e.g. a closed stream)
+                executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for batch in batches:
+                for notification in self.process_customer_batch(bedrock_generator, batch):
+                    processed += 1
+                    yield processed, total, notification
+    
+    def generate_notifications(self, max_workers=None, on_progress=None, run_stats=None):
+        """Main method to generate all notifications
+        
+        on_progress, if given, is called as on_progress(processed, total, notification)
+        once before processing starts and after each customer completes; notification
+        is None for skipped or failed customers. run_stats is passed to iter_notifications.
+        """
+        cache_stats_before = self.ai_cache.stats() if self.ai_cache else None
+        notifications = []
+        
+        for processed, total, notification in self.iter_notifications(max_workers, run_stats):
+            if notification is not None:
                 notifications.append(notification)
-                
-                print(f"  ✅ Created {priority_analysis['priority']} priority notification for {customer_name}")
-                
-            except Exception as e:
-                print(f"  ❌ Error processing customer {customer.get('Customer_ID', 'Unknown')}: {e}")
-                continue
+            if on_progress:
+                on_progress(processed, total, notification)
         
-        # Sort by priority and risk
-        notifications.sort(key=lambda x: (
-            {'high': 3, 'medium': 2, 'low': 1}.get(x['priority'], 1),
-            x['risk_score']
-        ), reverse=True)
+        notifications = self.sort_notifications(notifications)
         
         print(f"✅ Generated {len(notifications)} targeted notifications")
+        
+        if self.ai_cache:
+            cache_stats = self.ai_cache.stats()
+            print(f"💾 AI cache: {cache_stats['hits'] - cache_stats_before['hits']} hits, "
+                  f"{cache_stats['misses'] - cache_stats_before['misses']} model calls")
+        
+        bedrock_stats = bedrock_metrics.snapshot()
+        governor_stats = bedrock_governor.snapshot()
+        print(f"📡 Bedrock totals: {bedrock_stats['attempts']} attempts, {bedrock_stats['retries']} retries, "
+              f"{bedrock_stats['throttled']} throttled, {governor_stats['total_wait_seconds']}s queued by rate governor")
+        
         return notifications
 
+
+class NotificationJobManager:
+    """Runs notification generation in background threads so API requests return immediately"""
+    
+    def __init__(self, engine, max_finished_jobs=20):
+        self.engine = engine
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = {}
+        self._lock = threading.Lock()
+    
+    def start_job(self):
+        """Start a generation run and return its job record"""
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'pending',
+            'processed': 0,
+            'total': None,
+            'partial_results': [],
+            'results': None,
+            'error': None,
+            'created_at': datetime.now().isoformat(),
+            'completed_at': None
+        }
+        
+        with self._lock:
+            self._prune_finished_jobs()
+            self.jobs[job['job_id']] = job
+        
+        thread = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+        thread.start()
+        return job
+    
+    def get_job(self, job_id):
+        """Get a job record by id, or None if unknown"""
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def job_status(self, job, since=0):
+        """Progress snapshot with the partial results produced after index `since`"""
+        with self._lock:
+            return {
+                'job_id': job['job_id'],
+                'status': job['status'],
+                'processed': job['processed'],
+                'total': job['total'],
+                'partial_count': len(job['partial_results']),
+                'partial_results': job['partial_results'][since:],
+                'error': job['error'],
+                'created_at': job['created_at'],
+                'completed_at': job['completed_at']
+            }
+    
+    def _run_job(self, job):
+        """Generate notifications for a job, recording progress as customers complete"""
+        def on_progress(processed, total, notification):
+            with self._lock:
+                job['status'] = 'running'
+                job['processed'] = processed
+                job['total'] = total
+                if notification is not None:
+                    job['partial_results'].append(notification)
+        
+        try:
+            results = self.engine.generate_notifications(on_progress=on_progress)
+            with self._lock:
+                job['results'] = results
+                job['status'] = 'completed'
+        except Exception as e:
+            print(f"❌ Notification job {job['job_id']} failed: {e}")
+            with self._lock:
+                job['error'] = str(e)
+                job['status'] = 'failed'
+        finally:
+            with self._lock:
+                job['completed_at'] = datetime.now().isoformat()
+    
+    def _prune_finished_jobs(self):
+        """Keep only the most recent finished jobs in memory"""
+        finished = [job for job in self.jobs.values() if job['status'] in ('completed', 'failed')]
+        finished.sort(key=lambda job: job['created_at'])
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job['job_id']]
+
 # Initialize the notification engine
 if not os.path.exists('customer_data.db'):
     print("❌ Database not found! Please run: python database_setup.py")
     exit(1)
 
 notification_engine = SmartNotificationEngine('customer_data.db')
+notification_jobs = NotificationJobManager(notification_engine)
+
+def cached_by_data_version(view):
+    """Serve a read endpoint with ETag/Last-Modified from the database's data version
+    
+    A request whose If-None-Match or If-Modified-Since still matches the current
+    version gets an empty 304 without running the view or touching SQLite.
+    
+    HTTP dates have whole-second precision, so Last-Modified is the end of the
+    second the data changed in and is only sent once that second is over. Any
+    later change is then strictly newer than every Last-Modified a client holds,
+    and an If-Modified-Since in the same second as the change gets a full response.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        version, updated_at = read_data_version(notification_engine.db_path)
+        etag = f"v{version}-{int(updated_at * 1000)}"
+        last_modified = datetime.fromtimestamp(int(updated_at) + 1, timezone.utc)
+        
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = (request.if_modified_since is not None
+                            and request.if_modified_since.timestamp() > updated_at)
+        
+        response = Response(status=304) if not_modified else make_response(view(*args, **kwargs))
+        if response.status_code in (200, 304):
+            # Weak, because gzip and brotli encodings of the same data share the tag
+            response.set_etag(etag, weak=True)
+            if datetime.now(timezone.utc) >= last_modified:
+                response.last_modified = last_modified
+            # Browsers may keep the response but must revalidate before reusing it
+            response.cache_control.no_cache = True
+        return response
+    
+    return wrapper
+
+@app.after_request
+def compress_large_responses(response):
+    """gzip or brotli large JSON responses for clients that accept it"""
+    return compress_response(response, request.accept_encodings)
 
 @app.route('/')
 def dashboard():
@@ -720,12 +1278,126 @@ def get_notifications():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sse_event(event, data):
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/notifications/stream')
+def stream_notifications():
+    """Stream notifications as Server-Sent Events as each customer completes"""
+    def event_stream():
+        notifications = []
+        try:
+            for processed, total, notification in notification_engine.iter_notifications():
+                if notification is None:
+                    yield _sse_event('progress', {'processed': processed, 'total': total})
+                    continue
+                
+                notifications.append(notification)
+                yield _sse_event('notification', {
+                    'processed': processed,
+                    'total': total,
+                    'notification': notification
+                })
+            
+            # Final event carries the sorted order of everything already sent
+            sorted_notifications = notification_engine.sort_notifications(notifications)
+            print(f"✅ Streamed {len(sorted_notifications)} targeted notifications")
+            yield _sse_event('complete', {
+                'total': len(sorted_notifications),
+                'order': [n['customer_id'] for n in sorted_notifications]
+            })
+        except Exception as e:
+            # Not 'error', which EventSource reserves for connection failures
+            yield _sse_event('failed', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/notification-jobs', methods=['POST'])
+def start_notification_job():
+    """Start generating notifications in the background"""
+    try:
+        job = notification_jobs.start_job()
+        return jsonify({
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'status_url': f"/api/notification-jobs/{job['job_id']}",
+            'results_url': f"/api/notification-jobs/{job['job_id']}/results"
+        }), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notification-jobs/<job_id>')
+def get_notification_job(job_id):
+    """Report progress and partial results for a notification job"""
+    job = notification_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    
+    since = request.args.get('since', 0, type=int)
+    return jsonify(notification_jobs.job_status(job, since=max(0, since)))
+
+@app.route('/api/notification-jobs/<job_id>/results')
+def get_notification_job_results(job_id):
+    """Get the sorted notifications of a finished job"""
+    job = notification_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    
+    if job['status'] == 'failed':
+        return jsonify({'error': job['error']}), 500
+    if job['status'] != 'completed':
+        status = notification_jobs.job_status(job)
+        status.pop('partial_results')
+        return jsonify(status), 202
+    
+    return jsonify(job['results'])
+
+@app.route('/api/bedrock-metrics')
+def get_bedrock_metrics():
+    """Bedrock request, retry and throttling counters plus rate governor wait times for this process"""
+    return jsonify({**bedrock_metrics.snapshot(), 'governor': bedrock_governor.snapshot()})
+
 @app.route('/api/customers')
+@cached_by_data_version
 def get_customers():
-    """Get Value Seekers customers"""
+    """Get a page of Value Seekers customers
+    
+    Query parameters: after (the previous page's next_cursor), limit, fields
+    (comma-separated columns and history lists) and any of CUSTOMER_FILTERS;
+    other parameters (e.g. cache busters) are ignored. format=list returns the
+    bare array of earlier versions, with every match unless limit is given and
+    the next cursor in an X-Next-Cursor header.
+    """
     try:
-        customers = notification_engine.get_opted_in_value_seekers()
-        return jsonify(customers)
+        as_list = request.args.get('format') == 'list'
+        after = request.args.get('after')
+        limit = request.args.get('limit', None if as_list else DEFAULT_CUSTOMER_PAGE_SIZE)
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        filters = {name: request.args[name] for name in CUSTOMER_FILTERS if name in request.args}
+        
+        try:
+            after = int(after) if after is not None else None
+            if limit is not None:
+                limit = int(limit)
+                if not 1 <= limit <= MAX_CUSTOMER_PAGE_SIZE:
+                    raise ValueError(f"limit must be between 1 and {MAX_CUSTOMER_PAGE_SIZE}")
+            customers, next_cursor = notification_engine.get_customers_page(
+                after=after, limit=limit, fields=fields or None, filters=filters
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if as_list:
+            response = jsonify(customers)
+            if next_cursor is not None:
+                response.headers['X-Next-Cursor'] = str(next_cursor)
+            return response
+        return jsonify({'customers': customers, 'next_cursor': next_cursor, 'count': len(customers)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -751,73 +1423,72 @@ def send_notification():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _segments_panel(summary):
+    """Segment statistics from a Value Seekers summary"""
+    # Since we only have Value Seekers, create a simple summary
+    return {
+        'Value Seekers': {
+            'Customer_ID': summary['total_count'],
+            'Daily_Energy_Usage_kWh': summary['avg_churn_risk']
+        }
+    }
+
+def _value_seekers_panel(summary):
+    """Value Seekers analysis with averages rounded for display"""
+    return {
+        **summary,
+        'avg_age': round(summary['avg_age'], 1),
+        'avg_engagement_score': round(summary['avg_engagement_score'], 1),
+        'avg_churn_risk': round(summary['avg_churn_risk'], 1)
+    }
+
+def _billing_issues_panel():
+    """Customers with billing issues"""
+    # For now, return empty list since we don't have billing anomaly data in our clean system
+    return []
+
 @app.route('/api/segments')
+@cached_by_data_version
 def get_segments():
     """Get customer segments (Value Seekers only)"""
     try:
-        customers = notification_engine.get_opted_in_value_seekers()
-        
-        # Since we only have Value Seekers, create a simple summary
-        segments = {
-            'Value Seekers': {
-                'Customer_ID': len(customers),
-                'Daily_Energy_Usage_kWh': sum(c.get('Churn_Risk_Score', 0) for c in customers) / len(customers) if customers else 0
-            }
-        }
-        
-        return jsonify(segments)
+        return jsonify(_segments_panel(notification_engine.get_value_seeker_summary()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/billing-issues')
+@cached_by_data_version
 def get_billing_issues():
     """Get customers with billing issues"""
     try:
-        # For now, return empty list since we don't have billing anomaly data in our clean system
-        return jsonify([])
+        return jsonify(_billing_issues_panel())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/value-seekers')
+@cached_by_data_version
 def get_value_seekers():
     """Get Value Seekers analysis"""
     try:
-        customers = notification_engine.get_opted_in_value_seekers()
-        
-        if not customers:
-            return jsonify({
-                'total_count': 0,
-                'avg_age': 0,
-                'avg_engagement_score': 0,
-                'avg_churn_risk': 0,
-                'subscription_breakdown': {},
-                'location_breakdown': {}
-            })
-        
-        # Calculate statistics
-        total_count = len(customers)
-        avg_age = sum(c.get('Age', 0) for c in customers) / total_count
-        avg_engagement = sum(c.get('Engagement_Score', 0) for c in customers) / total_count
-        avg_churn_risk = sum(c.get('Churn_Risk_Score', 0) for c in customers) / total_count
-        
-        # Breakdown by subscription type
-        subscription_breakdown = {}
-        location_breakdown = {}
-        
-        for customer in customers:
-            sub_type = customer.get('Subscription_Type', 'Unknown')
-            location = customer.get('Location', 'Unknown')
-            
-            subscription_breakdown[sub_type] = subscription_breakdown.get(sub_type, 0) + 1
-            location_breakdown[location] = location_breakdown.get(location, 0) + 1
+        return jsonify(_value_seekers_panel(notification_engine.get_value_seeker_summary()))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard')
+@cached_by_data_version
+def get_dashboard():
+    """Everything the dashboard shows on load, from one summary query
+    
+    Each panel has the same shape as its own endpoint. The charts are drawn from
+    the summary's breakdowns, so no customer rows are sent.
+    """
+    try:
+        summary = notification_engine.get_value_seeker_summary()
         
         return jsonify({
-            'total_count': total_count,
-            'avg_age': round(avg_age, 1),
-            'avg_engagement_score': round(avg_engagement, 1),
-            'avg_churn_risk': round(avg_churn_risk, 1),
-            'subscription_breakdown': subscription_breakdown,
-            'location_breakdown': location_breakdown
+            'segments': _segments_panel(summary),
+            'value_seekers': _value_seekers_panel(summary),
+            'billing_issues': _billing_issues_panel()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -7,6 +7,7 @@ from datetime import datetime
 import json
 import boto3
 from botocore.exceptions import ClientError
+from bedrock_client import get_bedrock_client
 
 app = Flask(__name__)
 
@@ -14,10 +15,7 @@ class BedrockNotificationGenerator:
     def __init__(self):
         """Initialize Bedrock client"""
         try:
-            self.bedrock_client = boto3.client(
-                'bedrock-runtime',
-                region_name='us-east-1'  # Change to your preferred region
-            )
+            self.bedrock_client = get_bedrock_client()
             self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"  # Using Claude 3 Sonnet
         except Exception as e:
             print(f"Warning: Could not initialize Bedrock client: {e}")
@@ -0,0 +1,290 @@
+"""
+Process-wide AWS Bedrock runtime client with connection pooling,
+adaptive retries, timeouts and throttling metrics, plus a shared rate
+governor that keeps invoke_model calls within the account's quotas
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+BEDROCK_REGION = os.environ.get('BEDROCK_REGION', 'us-east-1')
+# Point at a local stand-in such as mock_bedrock_server.py instead of AWS
+BEDROCK_ENDPOINT_URL = os.environ.get('BEDROCK_ENDPOINT_URL') or None
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get('BEDROCK_MAX_POOL_CONNECTIONS', '50'))
+BEDROCK_CONNECT_TIMEOUT = float(os.environ.get('BEDROCK_CONNECT_TIMEOUT', '5'))
+BEDROCK_READ_TIMEOUT = float(os.environ.get('BEDROCK_READ_TIMEOUT', '60'))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get('BEDROCK_MAX_ATTEMPTS', '8'))
+
+# Quota budgets enforced by the governor; 0 disables that limit, so by default nothing is governed
+BEDROCK_REQUESTS_PER_MINUTE = int(os.environ.get('BEDROCK_REQUESTS_PER_MINUTE', '0'))
+BEDROCK_TOKENS_PER_MINUTE = int(os.environ.get('BEDROCK_TOKENS_PER_MINUTE', '0'))
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get('BEDROCK_MAX_CONCURRENCY', '0'))
+
+# Extra attempts when throttling still surfaces after botocore's own retries
+THROTTLE_RETRIES = 3
+THROTTLE_BACKOFF_SECONDS = 2.0
+
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceQuotaExceededException'
+}
+
+class BedrockMetrics:
+    """Thread-safe counters for Bedrock request attempts, retries and throttling"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero all counters"""
+        with self._lock:
+            self.attempts = 0
+            self.retries = 0
+            self.throttled = 0
+            self.errors = 0
+
+    def record_attempt(self, attempt_number, error_code=None, failed=False):
+        """Record one HTTP attempt and its outcome"""
+        with self._lock:
+            self.attempts += 1
+            if attempt_number > 1:
+                self.retries += 1
+            if error_code in THROTTLING_ERROR_CODES:
+                self.throttled += 1
+            elif failed:
+                self.errors += 1
+
+    def snapshot(self):
+        """Current counter values"""
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'errors': self.errors
+            }
+
+metrics = BedrockMetrics()
+
+_client = None
+_client_lock = threading.Lock()
+
+def _record_attempt(response=None, caught_exception=None, attempts=1, **kwargs):
+    """botocore needs-retry hook: runs after every attempt, before the retry decision"""
+    error_code = None
+    failed = caught_exception is not None
+    if response is not None:
+        http_response, parsed = response
+        error_code = parsed.get('Error', {}).get('Code')
+        failed = failed or http_response.status_code >= 400
+    metrics.record_attempt(attempts, error_code, failed)
+    # Returning None leaves the retry decision to botocore's adaptive retry handler
+    return None
+
+def create_bedrock_client(region_name=BEDROCK_REGION,
+                          max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                          connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+                          read_timeout=BEDROCK_READ_TIMEOUT,
+                          max_attempts=BEDROCK_MAX_ATTEMPTS,
+                          endpoint_url=BEDROCK_ENDPOINT_URL):
+    """Create a new Bedrock runtime client with tuned pooling, retries and timeouts"""
+    config = Config(
+        region_name=region_name,
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={'mode': 'adaptive', 'total_max_attempts': max_attempts}
+    )
+    credentials = {}
+    if endpoint_url and boto3.Session().get_credentials() is None:
+        # A local stand-in ignores signatures, but botocore still needs something to sign with
+        credentials = {'aws_access_key_id': 'local', 'aws_secret_access_key': 'local'}
+    client = boto3.client('bedrock-runtime', config=config, endpoint_url=endpoint_url, **credentials)
+    client.meta.events.register('needs-retry.bedrock-runtime.InvokeModel', _record_attempt)
+    return client
+
+def get_bedrock_client():
+    """Return the shared Bedrock runtime client, creating it on first use
+
+    boto3 clients are thread-safe, so one client (and its connection pool)
+    serves every request thread and worker in the process.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_bedrock_client()
+    return _client
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most one minute of budget"""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount):
+        """Take amount from the bucket and return how long the caller must wait before using it
+
+        The balance may go negative, so concurrent callers queue up behind each other in order.
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def refund(self, amount):
+        """Return unused budget, e.g. when fewer tokens were used than reserved"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self, seconds):
+        """Push the bucket into debt so new work waits roughly `seconds` (used after throttling)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate_per_second
+
+class BedrockRateGovernor:
+    """Keeps Bedrock calls within requests/min, tokens/min and concurrency budgets, queueing excess work"""
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_concurrency=0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waiting = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self, estimated_tokens):
+        """Block until a call of estimated_tokens fits the budgets, then hold a concurrency slot"""
+        started = time.monotonic()
+        acquired = False
+        with self._lock:
+            self.waiting += 1
+
+        try:
+            try:
+                if self._semaphore:
+                    self._semaphore.acquire()
+                    acquired = True
+                waits = [0.0]
+                if self.request_bucket:
+                    waits.append(self.request_bucket.reserve(1))
+                if self.token_bucket:
+                    waits.append(self.token_bucket.reserve(estimated_tokens))
+                if max(waits) > 0:
+                    time.sleep(max(waits))
+            finally:
+                # Leave the queue even if the wait was interrupted
+                with self._lock:
+                    self.waiting -= 1
+
+            waited = time.monotonic() - started
+            with self._lock:
+                self.calls += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+            yield
+        finally:
+            if acquired:
+                self._semaphore.release()
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Refund the token budget reserved beyond what the call actually used"""
+        if self.token_bucket and actual_tokens < estimated_tokens:
+            self.token_bucket.refund(estimated_tokens - actual_tokens)
+
+    def refund(self, estimated_tokens):
+        """Return the whole budget reserved for a call the service rejected without doing any work"""
+        if self.request_bucket:
+            self.request_bucket.refund(1)
+        if self.token_bucket:
+            self.token_bucket.refund(estimated_tokens)
+
+    def back_off(self, seconds=THROTTLE_BACKOFF_SECONDS):
+        """Slow everyone down after the service reported throttling"""
+        buckets = [bucket for bucket in (self.request_bucket, self.token_bucket) if bucket]
+        if not buckets:
+            # No budgets configured, so only this caller can wait
+            time.sleep(seconds)
+        for bucket in buckets:
+            bucket.drain(seconds)
+
+    def snapshot(self):
+        """Current queue and wait-time statistics"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'waiting': self.waiting,
+                'total_wait_seconds': round(self.total_wait_seconds, 3),
+                'avg_wait_seconds': round(self.total_wait_seconds / self.calls, 3) if self.calls else 0.0,
+                'max_wait_seconds': round(self.max_wait_seconds, 3)
+            }
+
+governor = BedrockRateGovernor(
+    requests_per_minute=BEDROCK_REQUESTS_PER_MINUTE,
+    tokens_per_minute=BEDROCK_TOKENS_PER_MINUTE,
+    max_concurrency=BEDROCK_MAX_CONCURRENCY
+)
+
+def estimate_tokens(prompt, max_tokens):
+    """Rough token cost of a call: ~4 characters per prompt token plus the output budget"""
+    return len(prompt) // 4 + max_tokens
+
+def invoke_text_model(client, model_id, prompt, max_tokens):
+    """Invoke an Anthropic model on Bedrock through the shared governor and return the response text"""
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    })
+    estimated = estimate_tokens(prompt, max_tokens)
+
+    for attempt in range(THROTTLE_RETRIES + 1):
+        try:
+            with governor.slot(estimated):
+                response = client.invoke_model(modelId=model_id, body=body)
+            break
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in THROTTLING_ERROR_CODES:
+                raise
+            # A throttled call consumed no quota; a retry reserves its budget again
+            governor.refund(estimated)
+            if attempt == THROTTLE_RETRIES:
+                raise
+            print(f"⏳ Bedrock throttled, backing off before retry {attempt + 1}/{THROTTLE_RETRIES}")
+            governor.back_off()
+
+    response_body = json.loads(response['body'].read())
+    usage = response_body.get('usage', {})
+    if usage:
+        governor.record_usage(estimated, usage.get('input_tokens', 0) + usage.get('output_tokens', 0))
+
+    return response_body['content'][0]['text'].strip()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the notification pipeline on synthetic data
+
+Generates customers with synthetic_data.py, builds a fresh database with
+database_setup.main and runs SmartNotificationEngine.generate_notifications,
+all against an in-process mock Bedrock with configurable latency. Reports
+per-stage timings, throughput and peak RSS, and writes them to a JSON file
+so runs can be compared for regressions.
+
+Usage:
+    python benchmark.py --customers 100000 --latency-ms 50 --output benchmark_100k.json
+    python benchmark.py --customers 100000 --latency-ms 50 --baseline benchmark_100k.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import bedrock_client
+import database_setup
+import response_encoding
+from mock_bedrock_server import MockBedrockServer, LATENCY_DISTRIBUTIONS
+from synthetic_data import SyntheticDataGenerator
+
+class StageTimer:
+    """Thread-safe collection of call durations per pipeline stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, function):
+        """Return function timed under stage"""
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return timed
+
+    @contextlib.contextmanager
+    def instrument(self, target, attribute, stage):
+        """Time every call to target.attribute (a class or an instance) while the block runs"""
+        original = getattr(target, attribute)
+        setattr(target, attribute, self.wrap(stage, original))
+        try:
+            yield
+        finally:
+            if isinstance(target, type):
+                setattr(target, attribute, original)
+            else:
+                delattr(target, attribute)
+
+    def summary(self):
+        """Calls, total and percentile milliseconds per stage
+
+        Stages run concurrently in worker threads, so totals can exceed wall time.
+        """
+        summary = {}
+        for stage, durations in self.durations.items():
+            milliseconds = np.array(durations) * 1000
+            summary[stage] = {
+                'calls': len(durations),
+                'total_seconds': round(float(milliseconds.sum()) / 1000, 3),
+                'mean_ms': round(float(milliseconds.mean()), 3),
+                'p50_ms': round(float(np.percentile(milliseconds, 50)), 3),
+                'p95_ms': round(float(np.percentile(milliseconds, 95)), 3),
+                'max_ms': round(float(milliseconds.max()), 3)
+            }
+        return summary
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (includes the in-process mock)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+@contextlib.contextmanager
+def quiet(enabled):
+    """Silence the per-customer progress output, which dominates large runs"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def benchmark_data_generation(args, data_dir):
+    started = time.perf_counter()
+    generator = SyntheticDataGenerator(
+        seed=args.seed,
+        interactions_per_customer=args.interactions_per_customer,
+        notifications_per_customer=args.notifications_per_customer,
+        actions_per_customer=args.actions_per_customer
+    )
+    row_counts = generator.write_csvs(data_dir, args.customers)
+    return {
+        'rows': row_counts,
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def benchmark_database_setup(args, data_dir, db_path):
+    """Time database_setup.main: CSV ingest, profile loading, classification and segment writes"""
+    timer = StageTimer()
+    DatabaseManager = database_setup.DatabaseManager
+    Classifier = database_setup.CustomerSegmentClassifier
+
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(timer.instrument(DatabaseManager, 'create_tables_from_csvs', 'ingest'))
+        stack.enter_context(timer.instrument(DatabaseManager, 'get_customer_profiles', 'db_fetch'))
+        stack.enter_context(timer.instrument(Classifier, '_build_classification_prompt', 'prompt_build'))
+        stack.enter_context(timer.instrument(Classifier, '_parse_segment_response', 'parse'))
+        stack.enter_context(timer.instrument(Classifier, 'classify_with_model', 'classify'))
+        stack.enter_context(timer.instrument(Classifier, 'fallback_segments', 'classify'))
+        stack.enter_context(timer.instrument(DatabaseManager, 'update_customer_segments', 'segment_write'))
+        stack.enter_context(timer.instrument(bedrock_client.get_bedrock_client(), 'invoke_model', 'model_call'))
+        stack.enter_context(quiet(not args.verbose))
+        database_setup.main(db_path=db_path, data_dir=data_dir, workers=args.classification_workers,
+                            use_segment_cache=False)
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        'customers': args.customers,
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_customers_per_second': round(args.customers / wall_seconds, 2),
+        'stages': timer.summary(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def benchmark_notifications(args, db_path):
+    """Time SmartNotificationEngine.generate_notifications stage by stage"""
+    # Imported here so app's module-level engine is created after the mock client is installed
+    from app import SmartNotificationEngine, BedrockNotificationGenerator, DEFAULT_PRESCREEN_RULES
+
+    engine = SmartNotificationEngine(
+        db_path,
+        max_workers=args.workers,
+        use_ai_cache=False,
+        prescreen_rules=DEFAULT_PRESCREEN_RULES if args.prescreen else None,
+        priority_batch_size=args.batch_size
+    )
+    timer = StageTimer()
+    Generator = BedrockNotificationGenerator
+
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(timer.instrument(engine, 'get_opted_in_value_seekers', 'db_fetch'))
+        stack.enter_context(timer.instrument(engine, 'prescreen_customers', 'prescreen'))
+        stack.enter_context(timer.instrument(Generator, '_build_priority_prompt', 'prompt_build'))
+        stack.enter_context(timer.instrument(Generator, '_build_batch_priority_prompt', 'prompt_build'))
+        stack.enter_context(timer.instrument(Generator, '_build_message_prompt', 'prompt_build'))
+        stack.enter_context(timer.instrument(bedrock_client.get_bedrock_client(), 'invoke_model', 'model_call'))
+        stack.enter_context(timer.instrument(Generator, '_split_batch_response', 'parse'))
+        stack.enter_context(timer.instrument(Generator, '_parse_priority_response', 'parse'))
+        stack.enter_context(timer.instrument(engine, 'assemble_notification', 'assemble'))
+        stack.enter_context(timer.instrument(engine, 'sort_notifications', 'sort'))
+        stack.enter_context(quiet(not args.verbose))
+        run_stats = {}
+        notifications = engine.generate_notifications(run_stats=run_stats)
+    wall_seconds = time.perf_counter() - started
+
+    engine.close()
+    stats = {
+        'value_seekers': run_stats.get('customers', 0),
+        'prescreened_out': run_stats.get('prescreened_out', 0),
+        'notifications': len(notifications),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_customers_per_second': round(run_stats.get('customers', 0) / wall_seconds, 2),
+        'stages': timer.summary(),
+        'governor': bedrock_client.governor.snapshot(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+    return stats, notifications
+
+def benchmark_serialisation(notifications, count, repeats=3):
+    """Time JSON encoding of `count` notifications per encoder and measure their size per content coding
+    
+    The generated notifications are cycled, with fresh customer IDs, to reach count.
+    """
+    from flask.json.provider import DefaultJSONProvider
+    from app import app as flask_app
+    
+    sample = [{**notifications[i % len(notifications)], 'customer_id': i} for i in range(count)]
+    providers = {'stdlib': DefaultJSONProvider(flask_app)}
+    if response_encoding.orjson is not None:
+        providers['orjson'] = response_encoding.OrjsonProvider(flask_app)
+    
+    results = {'notifications': count, 'encoders': {}, 'wire_bytes': {}}
+    for name, provider in providers.items():
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            # Same compact separators as Flask uses for responses outside debug mode
+            body = provider.dumps(sample, separators=(',', ':'))
+            timings.append(time.perf_counter() - started)
+        results['encoders'][name] = {'best_ms': round(min(timings) * 1000, 2), 'bytes': len(body.encode('utf-8'))}
+    
+    body = body.encode('utf-8')
+    results['wire_bytes']['identity'] = {'bytes': len(body), 'compress_ms': 0.0}
+    for encoding in response_encoding.available_encodings():
+        started = time.perf_counter()
+        compressed = response_encoding.compress(body, encoding)
+        results['wire_bytes'][encoding] = {
+            'bytes': len(compressed),
+            'compress_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+    
+    return results
+
+def assign_rule_based_segments(db_path, data_dir):
+    """Build the database and assign segments without model calls"""
+    db = database_setup.DatabaseManager(db_path)
+    db.create_tables_from_csvs(data_dir)
+    db.add_segment_column()
+    database_setup.classify_customers_with_rules(db, db.get_all_customer_ids())
+    db.close()
+
+def compare_with_baseline(results, baseline_path):
+    """Print wall time and per-stage total changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Compared with {baseline_path}:")
+    for phase in ['database_setup', 'notifications']:
+        if phase not in results or phase not in baseline:
+            continue
+        current, previous = results[phase], baseline[phase]
+        print(f"  {phase}: {previous['wall_seconds']}s → {current['wall_seconds']}s "
+              f"({_percent_change(previous['wall_seconds'], current['wall_seconds'])})")
+        for stage, stats in current['stages'].items():
+            previous_stats = previous['stages'].get(stage)
+            if previous_stats:
+                print(f"    {stage}: {previous_stats['total_seconds']}s → {stats['total_seconds']}s "
+                      f"({_percent_change(previous_stats['total_seconds'], stats['total_seconds'])})")
+
+def _percent_change(previous, current):
+    if not previous:
+        return 'n/a'
+    return f"{(current - previous) / previous:+.1%}"
+
+def print_phase(name, phase):
+    print(f"\n⏱️ {name}: {phase['wall_seconds']}s wall, "
+          f"{phase['throughput_customers_per_second']} customers/s, peak RSS {phase['peak_rss_mb']} MB")
+    for stage, stats in phase['stages'].items():
+        print(f"  {stage:<14} {stats['calls']:>9} calls  {stats['total_seconds']:>10.3f}s total  "
+              f"p50 {stats['p50_ms']:.2f}ms  p95 {stats['p95_ms']:.2f}ms")
+
+def print_serialisation(results):
+    print(f"\n📦 Serialising {results['notifications']} notifications:")
+    for name, stats in results['encoders'].items():
+        print(f"  {name:<8} {stats['best_ms']:>9.2f}ms  {stats['bytes']:>12,} bytes")
+    for encoding, stats in results['wire_bytes'].items():
+        print(f"  {encoding:<8} {stats['compress_ms']:>9.2f}ms  {stats['bytes']:>12,} bytes on the wire")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the notification pipeline on synthetic data')
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--interactions-per-customer', type=int, default=3)
+    parser.add_argument('--notifications-per-customer', type=int, default=3)
+    parser.add_argument('--actions-per-customer', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=50, help='Mean mock Bedrock latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=10)
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=8, help='Notification workers')
+    parser.add_argument('--classification-workers', type=int, default=database_setup.CLASSIFICATION_WORKERS,
+                        help='Segment classification workers in database_setup.main')
+    parser.add_argument('--batch-size', type=int, default=1, help='Customers per priority analysis request')
+    parser.add_argument('--prescreen', action='store_true',
+                        help='Skip low-risk customers with DEFAULT_PRESCREEN_RULES before any model call')
+    parser.add_argument('--skip-setup-classification', action='store_true',
+                        help='Only benchmark notifications; segments are assigned with the rule-based fallback')
+    parser.add_argument('--serialisation-notifications', type=int, default=10000,
+                        help='Notifications to JSON-encode and compress after the run (0 to skip)')
+    parser.add_argument('--work-dir', help='Keep generated CSVs and database here (default: temporary)')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='Show per-customer pipeline output')
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='sne_benchmark_')
+    data_dir = os.path.join(work_dir, 'data')
+    db_path = os.path.join(work_dir, 'customer_data.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'config': vars(args),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform()
+        }
+    }
+
+    print(f"🧪 Benchmarking {args.customers} synthetic customers in {work_dir}")
+
+    results['data_generation'] = benchmark_data_generation(args, data_dir)
+    print(f"✅ Generated synthetic CSVs in {results['data_generation']['wall_seconds']}s")
+
+    with MockBedrockServer(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_distribution=args.latency_distribution,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed
+    ) as server:
+        # Route the shared client, and everything built on it, to the mock
+        bedrock_client._client = bedrock_client.create_bedrock_client(endpoint_url=server.endpoint_url)
+
+        if args.skip_setup_classification:
+            with quiet(not args.verbose):
+                assign_rule_based_segments(db_path, data_dir)
+        else:
+            results['database_setup'] = benchmark_database_setup(args, data_dir, db_path)
+            print_phase('database_setup.main', results['database_setup'])
+
+        results['notifications'], notifications = benchmark_notifications(args, db_path)
+        print_phase('generate_notifications', results['notifications'])
+        
+        if args.serialisation_notifications and notifications:
+            results['serialisation'] = benchmark_serialisation(notifications, args.serialisation_notifications)
+            print_serialisation(results['serialisation'])
+        results['mock_bedrock'] = server.behaviour.snapshot()
+
+    results['peak_rss_mb'] = peak_rss_mb()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Data version counter for a customer database, kept in a small sidecar file
+next to it (customer_data.db.version). Writers bump it after every ingest or
+segment update; the web app turns it into ETag and Last-Modified headers, so
+conditional requests are answered without opening SQLite.
+"""
+import json
+import os
+import threading
+import time
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def version_path(db_path):
+    """Path of the version sidecar for db_path"""
+    return f"{os.path.abspath(db_path)}.version"
+
+def bump_data_version(db_path):
+    """Record that the data in db_path changed and return the new version number"""
+    version, _ = read_data_version(db_path)
+    state = {'version': version + 1, 'updated_at': time.time()}
+
+    # Write then rename, so readers never see a half-written file
+    path = version_path(db_path)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+    return state['version']
+
+def read_data_version(db_path):
+    """Return (version, updated_at epoch seconds) for db_path
+
+    The sidecar is only re-read when it has been replaced. A database that has
+    never been bumped reports version 0, last modified when the database file was.
+    """
+    path = version_path(db_path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0, os.path.getmtime(db_path)
+
+    # Every bump renames a new file into place, so the inode changes even within one mtime tick
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    with open(path) as f:
+        state = json.load(f)
+    result = (state['version'], state['updated_at'])
+
+    with _cache_lock:
+        _cache[path] = (signature, result)
+    return result
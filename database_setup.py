@@ -2,13 +2,177 @@
 Database setup script to create SQLite database from CSV files
 and classify customers into segments using AI analysis
 """
+import argparse
 import sqlite3
 import pandas as pd
+import numpy as np
 import os
-from datetime import datetime
 import json
-import boto3
-from botocore.exceptions import ClientError
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from ai_cache import AIResponseCache
+from bedrock_client import get_bedrock_client, invoke_text_model
+from data_version import bump_data_version
+
+# Source CSV file for each table, relative to the data folder
+CSV_FILES = {
+    'customer_profiles': 'Customer Profiles.csv',
+    'account_activity': 'Account Activity Logs.csv',
+    'interaction_history': 'Interaction History.csv',
+    'notification_history': 'Notification History.csv',
+    'recommended_actions': 'Recommended Actions.csv'
+}
+
+# Segment classification concurrency and how many customers are committed together
+CLASSIFICATION_WORKERS = int(os.environ.get('CLASSIFICATION_WORKERS', '8'))
+CLASSIFICATION_CHUNK_SIZE = int(os.environ.get('CLASSIFICATION_CHUNK_SIZE', '500'))
+
+# Segment classifier used by main(): 'llm', 'rules' or 'hybrid' (rules, with the LLM for ambiguous rows)
+CLASSIFICATION_MODES = ('llm', 'rules', 'hybrid')
+CLASSIFICATION_MODE = os.environ.get('CLASSIFICATION_MODE', 'llm')
+
+# Bump whenever _build_classification_prompt or _parse_segment_response changes,
+# so segments cached for the old prompt are no longer reused
+CLASSIFICATION_PROMPT_VERSION = 1
+CLASSIFICATION_MAX_TOKENS = 100
+
+# Classified segments are cached next to the database, keyed by the prompt inputs.
+# Segments only go stale when the prompt changes, so they are kept far longer than
+# notification responses.
+SEGMENT_CACHE_FILE = 'segment_cache.db'
+SEGMENT_CACHE_TTL_SECONDS = 365 * 24 * 60 * 60
+SEGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('SEGMENT_CACHE_MAX_ENTRIES', '1000000'))
+
+# Rows read from a CSV per chunk during ingest; bounds memory for multi-GB exports
+DEFAULT_INGEST_CHUNK_ROWS = 50000
+
+# Free-text CSV timestamps stored alongside a normalized, sortable copy:
+# table -> (source column, normalized column). Normalized values use the
+# 'YYYY-MM-DD HH:MM:SS' form of SQLite's datetime(), so they sort as text.
+TIMESTAMP_COLUMNS = {
+    'interaction_history': ('Date & Time', 'Interaction_Timestamp'),
+    'notification_history': ('Sent_Date', 'Sent_Timestamp')
+}
+# Tables whose normalized timestamp is part of the primary key. Rows whose source
+# timestamp cannot be parsed are skipped and counted instead of failing the load.
+REQUIRED_TIMESTAMP_TABLES = {'notification_history'}
+
+# Explicit DDL for every table, in dependency order (parents first). Single-row-per-customer
+# tables are clustered on Customer_ID; notification_history is a WITHOUT ROWID table clustered
+# on (Customer_ID, Sent_Timestamp) so "latest N per customer" reads contiguous rows.
+TABLE_SCHEMAS = {
+    'customer_profiles': """
+        CREATE TABLE customer_profiles (
+            Customer_ID INTEGER PRIMARY KEY,
+            Name TEXT NOT NULL,
+            Age INTEGER,
+            Location TEXT,
+            Preferred_Channel TEXT,
+            Segment TEXT,
+            Opted_In TEXT NOT NULL CHECK (Opted_In IN ('Yes', 'No')),
+            Income_Bracket TEXT CHECK (Income_Bracket IN ('Low', 'Medium', 'High')),
+            Customer_Since TEXT,
+            Satisfaction_Score INTEGER,
+            customer_segment TEXT CHECK (customer_segment IN ('Value Seekers', 'Traditionalists', 'Digital Natives', 'Eco Savers')),
+            Row_Hash INTEGER
+        )""",
+    'account_activity': """
+        CREATE TABLE account_activity (
+            Customer_ID INTEGER PRIMARY KEY REFERENCES customer_profiles(Customer_ID) ON DELETE CASCADE,
+            Account_Status TEXT CHECK (Account_Status IN ('Active', 'At Risk', 'Dormant', 'Suspended')),
+            Last_Transaction TEXT,
+            Last_Login TEXT,
+            Recent_Activity TEXT,
+            Engagement_Score INTEGER,
+            Account_Tenure_Years INTEGER,
+            Subscription_Type TEXT CHECK (Subscription_Type IN ('Basic', 'Premium', 'Green')),
+            Churn_Risk_Score INTEGER,
+            Row_Hash INTEGER
+        )""",
+    'interaction_history': """
+        CREATE TABLE interaction_history (
+            Interaction_ID INTEGER PRIMARY KEY,
+            Customer_ID INTEGER NOT NULL REFERENCES customer_profiles(Customer_ID) ON DELETE CASCADE,
+            Channel TEXT,
+            [Date & Time] TEXT,
+            Interaction_Type TEXT,
+            Sentiment TEXT CHECK (Sentiment IN ('Positive', 'Negative', 'Neutral')),
+            Summary TEXT,
+            Response_Time_Minutes INTEGER,
+            Resolution_Status TEXT CHECK (Resolution_Status IN ('Resolved', 'Pending', 'Escalated')),
+            Agent_ID TEXT,
+            Interaction_Timestamp TEXT,
+            Row_Hash INTEGER
+        )""",
+    'notification_history': """
+        CREATE TABLE notification_history (
+            Notification_ID TEXT NOT NULL UNIQUE,
+            Customer_ID INTEGER NOT NULL REFERENCES customer_profiles(Customer_ID) ON DELETE CASCADE,
+            Channel TEXT,
+            Sent_Date TEXT,
+            Notification_Type TEXT,
+            Opened TEXT CHECK (Opened IN ('Yes', 'No')),
+            Clicked TEXT CHECK (Clicked IN ('Yes', 'No')),
+            Action_Taken TEXT,
+            Delivery_Status TEXT CHECK (Delivery_Status IN ('Delivered', 'Failed', 'Bounced')),
+            Notification_Priority TEXT CHECK (Notification_Priority IN ('High', 'Medium', 'Low')),
+            Response_Time_Hours INTEGER,
+            Sent_Timestamp TEXT NOT NULL,
+            Row_Hash INTEGER,
+            PRIMARY KEY (Customer_ID, Sent_Timestamp DESC, Notification_ID)
+        ) WITHOUT ROWID""",
+    'recommended_actions': """
+        CREATE TABLE recommended_actions (
+            Action_ID INTEGER PRIMARY KEY,
+            Customer_ID INTEGER NOT NULL REFERENCES customer_profiles(Customer_ID) ON DELETE CASCADE,
+            Scenario TEXT,
+            Recommended_Action TEXT,
+            Urgency_Level TEXT CHECK (Urgency_Level IN ('High', 'Medium', 'Low')),
+            Follow_Up_Required TEXT CHECK (Follow_Up_Required IN ('Yes', 'No')),
+            Assigned_Team TEXT,
+            Row_Hash INTEGER
+        )"""
+}
+
+# Text pandas read_csv treats as missing by default. CSVs are read with keep_default_na=False
+# so row hashes see the exact text, and these become NULL when the rows are stored.
+MISSING_VALUE_TEXT = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+# Natural key each table's CSV rows are matched on during incremental ingest. Tables
+# without one are matched on Row_Hash, so a changed row is a delete plus an insert.
+TABLE_KEYS = {
+    'customer_profiles': 'Customer_ID',
+    'account_activity': 'Customer_ID',
+    'interaction_history': None,
+    'notification_history': 'Notification_ID',
+    'recommended_actions': None
+}
+
+# Customers whose source rows changed since they were last classified
+DIRTY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS customer_dirty (
+        Customer_ID INTEGER PRIMARY KEY,
+        Marked_At TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )"""
+
+def normalize_timestamps(values):
+    """Parse CSV timestamps into 'YYYY-MM-DD HH:MM:SS' text, leaving unparseable values NULL"""
+    parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+    return parsed.dt.strftime('%Y-%m-%d %H:%M:%S').where(parsed.notna(), None)
+
+def occurrence_in_chunk(values):
+    """Return, for each element, how many equal elements come before it (0 for the first copy)"""
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    index = np.arange(len(values))
+    run_starts = np.maximum.accumulate(np.where(np.r_[True, ordered[1:] != ordered[:-1]], index, 0))
+    occurrence = np.empty(len(values), dtype='int64')
+    occurrence[order] = index - run_starts
+    return occurrence
 
 class DatabaseManager:
     def __init__(self, db_path='customer_data.db'):
@@ -16,43 +180,315 @@ class DatabaseManager:
         self.conn = sqlite3.connect(db_path)
         self.conn.execute("PRAGMA foreign_keys = ON")
         
-    def create_tables_from_csvs(self):
-        """Create database tables from CSV files in user_data folder"""
+    def create_schema(self):
+        """(Re)create all tables from TABLE_SCHEMAS, dropping children before their parents"""
+        self._recreate_tables()
+        self.conn.commit()
+    
+    def _recreate_tables(self):
+        """Drop and create every table without committing"""
+        for table_name in reversed(list(TABLE_SCHEMAS)):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        
+        for table_sql in TABLE_SCHEMAS.values():
+            self.conn.execute(table_sql)
+        
+        # A full rebuild reclassifies everyone, so nothing is left dirty
+        self.conn.execute("DROP TABLE IF EXISTS customer_dirty")
+        self.conn.execute(DIRTY_TABLE_SQL)
+    
+    def create_tables_from_csvs(self, data_dir='user_data', chunk_rows=DEFAULT_INGEST_CHUNK_ROWS):
+        """Create database tables from CSV files in the data_dir folder (user_data by default)
+        
+        Each file is streamed in chunks of chunk_rows, so memory use stays flat however
+        large the export is. Dropping the old tables, loading and indexing all happen in
+        one transaction: readers keep seeing the previous data until it commits, and a
+        failed import leaves the previous data in place.
+        """
         csv_files = {
-            'customer_profiles': 'user_data/Customer Profiles.csv',
-            'account_activity': 'user_data/Account Activity Logs.csv',
-            'interaction_history': 'user_data/Interaction History.csv',
-            'notification_history': 'user_data/Notification History.csv',
-            'recommended_actions': 'user_data/Recommended Actions.csv'
+            table_name: os.path.join(data_dir, file_name)
+            for table_name, file_name in CSV_FILES.items()
         }
         
         print("🗄️ Creating database tables from CSV files...")
         
-        for table_name, csv_path in csv_files.items():
-            if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
-                df.to_sql(table_name, self.conn, if_exists='replace', index=False)
-                print(f"✅ Created table '{table_name}' with {len(df)} records")
-            else:
-                print(f"❌ CSV file not found: {csv_path}")
+        with self.bulk_load_pragmas():
+            self.conn.execute("BEGIN")
+            try:
+                self._recreate_tables()
+                for table_name, csv_path in csv_files.items():
+                    if os.path.exists(csv_path):
+                        started = time.perf_counter()
+                        rows = self._stream_csv_into_table(table_name, csv_path, chunk_rows)
+                        elapsed = time.perf_counter() - started
+                        print(f"✅ Created table '{table_name}' with {rows} records "
+                              f"({rows / elapsed:,.0f} rows/sec)")
+                    else:
+                        print(f"❌ CSV file not found: {csv_path}")
+                
+                # Indexes are built once after loading rather than maintained row by row
+                self._create_index_statements()
+                self.conn.commit()
+            except Exception:
+                # Constraint violations fail the whole import rather than leaving it half loaded
+                self.conn.rollback()
+                raise
+        
+        print("✅ Created database indexes")
+        bump_data_version(self.db_path)
+    
+    def _stream_csv_into_table(self, table_name, csv_path, chunk_rows):
+        """Insert a CSV into an existing table chunk by chunk, inside the caller's transaction"""
+        rows = 0
+        skipped = 0
+        for chunk in self._read_csv_chunks(csv_path, chunk_rows):
+            prepared = self._prepare_chunk(table_name, chunk)
+            self._insert_chunk(table_name, prepared)
+            rows += len(prepared)
+            skipped += len(chunk) - len(prepared)
+        self._report_skipped_timestamps(table_name, skipped)
+        return rows
+    
+    def _read_csv_chunks(self, csv_path, chunk_rows):
+        """Yield raw CSV chunks with a Row_Hash per row
+        
+        Values are read as text so the hash of an unchanged row is stable between
+        exports; column type affinity converts numbers when the rows are inserted.
+        """
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+            chunk['Row_Hash'] = pd.util.hash_pandas_object(chunk, index=False).astype('int64')
+            yield chunk
+    
+    def _prepare_chunk(self, table_name, chunk):
+        """Turn empty and missing-value CSV fields into NULL and add the normalized timestamp column
+        
+        Rows of REQUIRED_TIMESTAMP_TABLES without a parseable timestamp are dropped.
+        """
+        chunk = chunk.astype(object).where(~chunk.isin(MISSING_VALUE_TEXT), None)
+        if table_name in TIMESTAMP_COLUMNS:
+            source_column, timestamp_column = TIMESTAMP_COLUMNS[table_name]
+            chunk[timestamp_column] = normalize_timestamps(chunk[source_column])
+            if table_name in REQUIRED_TIMESTAMP_TABLES:
+                chunk = chunk[chunk[timestamp_column].notna()]
+        return chunk
+    
+    def _report_skipped_timestamps(self, table_name, skipped):
+        """Log rows _prepare_chunk dropped for an unparseable timestamp"""
+        if skipped:
+            source_column = TIMESTAMP_COLUMNS[table_name][0]
+            print(f"⚠️ Skipped {skipped} '{table_name}' rows with a missing or unparseable {source_column}")
+    
+    def _insert_chunk(self, table_name, chunk):
+        """Insert a prepared chunk with a single executemany"""
+        columns = ', '.join(f"[{column}]" for column in chunk.columns)
+        placeholders = ', '.join('?' for _ in chunk.columns)
+        self.conn.executemany(
+            f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})",
+            chunk.itertuples(index=False, name=None)
+        )
+    
+    def ingest_csvs_incrementally(self, data_dir='user_data', chunk_rows=DEFAULT_INGEST_CHUNK_ROWS):
+        """Apply only new, changed and deleted CSV rows to the existing tables
+        
+        Every CSV is staged in a temporary table and compared with the stored rows by
+        natural key (TABLE_KEYS) and Row_Hash. Customers with any affected row are
+        recorded in customer_dirty so only they are reclassified. Existing segments are
+        kept. Returns the number of customers marked dirty.
+        """
+        print("🔄 Applying CSV changes incrementally...")
+        self.conn.execute(DIRTY_TABLE_SQL)
+        dirty_before = self.conn.execute("SELECT COUNT(*) FROM customer_dirty").fetchone()[0]
+        
+        for table_name, file_name in CSV_FILES.items():
+            csv_path = os.path.join(data_dir, file_name)
+            if not os.path.exists(csv_path):
+                # A missing export must not be mistaken for every row being deleted
+                print(f"❌ CSV file not found, leaving '{table_name}' unchanged: {csv_path}")
+                continue
+            
+            started = time.perf_counter()
+            changes = self._apply_csv_changes(table_name, csv_path, chunk_rows)
+            print(f"✅ '{table_name}': {changes['upserted']} new or changed, {changes['deleted']} deleted, "
+                  f"{changes['rows']} rows checked in {time.perf_counter() - started:.2f}s")
         
-        # Create indexes for better performance
         self.create_indexes()
+        bump_data_version(self.db_path)
+        dirty = self.conn.execute("SELECT COUNT(*) FROM customer_dirty").fetchone()[0] - dirty_before
+        print(f"🎯 {dirty} customers marked for reclassification")
+        return dirty
+    
+    def _apply_csv_changes(self, table_name, csv_path, chunk_rows):
+        """Merge one CSV's differences into table_name in a single transaction
+        
+        Stored and CSV rows are compared as multisets of Row_Hash counts in memory, so
+        identical rows in tables without a key are matched one for one and only new and
+        changed rows are parsed and staged in a temporary table. Child rows whose
+        customer is no longer in customer_profiles are skipped.
+        """
+        self._ensure_row_hash_column(table_name)
+        stored_hashes = np.fromiter(
+            (row[0] for row in self.conn.execute(f"SELECT Row_Hash FROM {table_name} WHERE Row_Hash IS NOT NULL")),
+            dtype='int64'
+        )
+        stored_unique, stored_counts = np.unique(stored_hashes, return_counts=True)
+        seen_counts = np.zeros(len(stored_unique), dtype='int64')
         
+        self.conn.execute("DROP TABLE IF EXISTS temp.staged_rows")
+        self.conn.execute("DROP TABLE IF EXISTS temp.gone_hashes")
+        self.conn.execute(f"CREATE TEMP TABLE staged_rows AS SELECT * FROM main.{table_name} WHERE 0")
+        self.conn.execute("CREATE TEMP TABLE gone_hashes (Row_Hash INTEGER PRIMARY KEY, Surplus INTEGER NOT NULL)")
+        
+        key = TABLE_KEYS[table_name]
+        rows = 0
+        columns = None
+        skipped = 0
+        try:
+            for chunk in self._read_csv_chunks(csv_path, chunk_rows):
+                rows += len(chunk)
+                columns = list(chunk.columns)
+                hashes = chunk['Row_Hash'].to_numpy()
+                is_changed = ~np.isin(hashes, stored_unique)
+                known = np.flatnonzero(~is_changed)
+                if len(known):
+                    # The n-th copy of a hash in the CSV matches the n-th stored copy, if there is one
+                    positions = np.searchsorted(stored_unique, hashes[known])
+                    occurrence = seen_counts[positions] + occurrence_in_chunk(positions)
+                    is_changed[known] = occurrence >= stored_counts[positions]
+                    seen_counts += np.bincount(positions, minlength=len(seen_counts))
+                changed = chunk[is_changed]
+                if len(changed):
+                    prepared = self._prepare_chunk(table_name, changed)
+                    self._insert_chunk('temp.staged_rows', prepared)
+                    skipped += len(changed) - len(prepared)
+            
+            if columns is None:
+                # An empty file is treated like a missing one rather than deleting everything
+                return {'rows': 0, 'upserted': 0, 'deleted': 0}
+            
+            if table_name != 'customer_profiles':
+                # Deleting a profile cascades to its child rows; ones still exported for it are not re-added
+                orphans = self.conn.execute("""
+                    DELETE FROM staged_rows
+                    WHERE Customer_ID NOT IN (SELECT Customer_ID FROM customer_profiles)
+                """).rowcount
+                if orphans:
+                    print(f"⚠️ Skipped {orphans} '{table_name}' rows for customers not in customer_profiles")
+            
+            # Stored copies beyond those still in the CSV were changed or deleted
+            surplus = stored_counts - seen_counts
+            gone = surplus > 0
+            self.conn.executemany(
+                "INSERT INTO gone_hashes VALUES (?, ?)",
+                zip(stored_unique[gone].tolist(), surplus[gone].tolist())
+            )
+            removed = "Row_Hash IS NULL OR Row_Hash IN (SELECT Row_Hash FROM gone_hashes)"
+            
+            # Both the new customer of a changed row and its previous one are dirty
+            self.conn.execute(f"""
+                INSERT OR IGNORE INTO customer_dirty (Customer_ID)
+                SELECT Customer_ID FROM staged_rows
+                UNION
+                SELECT Customer_ID FROM {table_name} WHERE {removed}
+            """)
+            
+            # Only CSV-derived columns are merged, so upserted customers keep their segment
+            if table_name in TIMESTAMP_COLUMNS:
+                columns.append(TIMESTAMP_COLUMNS[table_name][1])
+            staged_columns = ', '.join(f"[{column}]" for column in columns)
+            if key:
+                updates = ', '.join(f"[{column}] = excluded.[{column}]" for column in columns if column != key)
+                upsert_sql = f"""
+                    INSERT INTO {table_name} ({staged_columns})
+                    SELECT {staged_columns} FROM staged_rows WHERE true
+                    ON CONFLICT({key}) DO UPDATE SET {updates}
+                """
+            else:
+                upsert_sql = f"INSERT INTO {table_name} ({staged_columns}) SELECT {staged_columns} FROM staged_rows"
+            
+            upserted = self.conn.execute(upsert_sql).rowcount
+            if key:
+                # Changed keyed rows were just updated in place, so only vanished rows still match
+                deleted = self.conn.execute(f"DELETE FROM {table_name} WHERE {removed}").rowcount
+            else:
+                # Remove only the surplus copies of each hash, newest first
+                deleted = self.conn.execute(f"DELETE FROM {table_name} WHERE Row_Hash IS NULL").rowcount
+                deleted += self.conn.execute(f"""
+                    DELETE FROM {table_name} WHERE rowid IN (
+                        SELECT row_id FROM (
+                            SELECT t.rowid AS row_id, g.Surplus,
+                                   ROW_NUMBER() OVER (PARTITION BY t.Row_Hash ORDER BY t.rowid DESC) AS copy
+                            FROM {table_name} t
+                            JOIN gone_hashes g ON g.Row_Hash = t.Row_Hash
+                        )
+                        WHERE copy <= Surplus
+                    )
+                """).rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.execute("DROP TABLE IF EXISTS temp.staged_rows")
+            self.conn.execute("DROP TABLE IF EXISTS temp.gone_hashes")
+        
+        self._report_skipped_timestamps(table_name, skipped)
+        return {'rows': rows, 'upserted': upserted, 'deleted': deleted}
+    
+    def _ensure_row_hash_column(self, table_name):
+        """Add Row_Hash to tables built before it existed; their rows then count as changed once"""
+        columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")]
+        if 'Row_Hash' not in columns:
+            self.conn.execute(f"ALTER TABLE {table_name} ADD COLUMN Row_Hash INTEGER")
+    
+    def clear_dirty_customers(self):
+        """Forget remaining dirty markers, e.g. for customers deleted since they were marked"""
+        self.conn.execute("DELETE FROM customer_dirty")
+        self.conn.commit()
+    
+    @contextmanager
+    def bulk_load_pragmas(self):
+        """Skip fsyncs while a full rebuild loads, restoring the previous setting afterwards
+        
+        The journal mode is left alone: leaving WAL needs exclusive access, which
+        the app's open read connections would deny.
+        """
+        synchronous = self.conn.execute("PRAGMA synchronous").fetchone()[0]
+        self.conn.execute("PRAGMA synchronous = OFF")
+        try:
+            yield
+        finally:
+            self.conn.execute(f"PRAGMA synchronous = {synchronous}")
+    
     def create_indexes(self):
-        """Create indexes on foreign key columns"""
+        """Create indexes on foreign key, timestamp and segment columns
+        
+        account_activity and notification_history are already clustered on Customer_ID
+        by their primary keys, so only the surrogate-keyed tables need indexes.
+        """
+        self._create_index_statements()
+        self.conn.commit()
+        print("✅ Created database indexes")
+    
+    def _create_index_statements(self):
+        """Create every index without committing"""
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_account_customer_id ON account_activity(Customer_ID)",
-            "CREATE INDEX IF NOT EXISTS idx_interaction_customer_id ON interaction_history(Customer_ID)",
-            "CREATE INDEX IF NOT EXISTS idx_notification_customer_id ON notification_history(Customer_ID)",
-            "CREATE INDEX IF NOT EXISTS idx_actions_customer_id ON recommended_actions(Customer_ID)"
+            # Composite index makes "latest N per customer" an index range scan
+            "CREATE INDEX IF NOT EXISTS idx_interaction_customer_ts ON interaction_history(Customer_ID, Interaction_Timestamp DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_actions_customer_id ON recommended_actions(Customer_ID)",
+            # Dashboard aggregates and the Value Seekers query filter on segment and opt-in
+            "CREATE INDEX IF NOT EXISTS idx_profiles_segment_opted_in ON customer_profiles(customer_segment, Opted_In)"
         ]
         
+        # Incremental ingest matches rows without a natural key by hash. Tables from the
+        # old pandas import have no Row_Hash until their first incremental ingest adds it.
+        for table_name, index_name in [('interaction_history', 'idx_interaction_row_hash'),
+                                       ('recommended_actions', 'idx_actions_row_hash')]:
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")]
+            if 'Row_Hash' in columns:
+                indexes.append(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}(Row_Hash)")
+        
         for index_sql in indexes:
             self.conn.execute(index_sql)
-        
-        self.conn.commit()
-        print("✅ Created database indexes")
     
     def get_customer_complete_profile(self, customer_id):
         """Get complete customer profile from all tables"""
@@ -82,7 +518,7 @@ class DatabaseManager:
         cursor = self.conn.execute(
             """SELECT * FROM interaction_history 
                WHERE Customer_ID = ? 
-               ORDER BY datetime([Date & Time]) DESC 
+               ORDER BY Interaction_Timestamp DESC 
                LIMIT 5""", 
             (customer_id,)
         )
@@ -95,7 +531,7 @@ class DatabaseManager:
         cursor = self.conn.execute(
             """SELECT * FROM notification_history 
                WHERE Customer_ID = ? 
-               ORDER BY datetime(Sent_Date) DESC 
+               ORDER BY Sent_Timestamp DESC 
                LIMIT 10""", 
             (customer_id,)
         )
@@ -116,11 +552,77 @@ class DatabaseManager:
         
         return profile
     
+    def get_customer_profiles(self, customer_ids):
+        """Load complete profiles for many customers with one query per table
+        
+        Returns {customer_id: profile} with the same shape as get_customer_complete_profile.
+        """
+        ids = json.dumps(list(customer_ids))
+        profiles = {customer_id: {} for customer_id in customer_ids}
+        
+        sections = [
+            ('basic', "SELECT * FROM customer_profiles WHERE Customer_ID IN (SELECT value FROM json_each(?))", ()),
+            ('activity', "SELECT * FROM account_activity WHERE Customer_ID IN (SELECT value FROM json_each(?))", ()),
+            ('interactions', """
+                SELECT * FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY Customer_ID ORDER BY Interaction_Timestamp DESC
+                    ) AS row_num
+                    FROM interaction_history
+                    WHERE Customer_ID IN (SELECT value FROM json_each(?))
+                )
+                WHERE row_num <= ?
+                ORDER BY Customer_ID, row_num""", (5,)),
+            ('notifications', """
+                SELECT * FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY Customer_ID ORDER BY Sent_Timestamp DESC
+                    ) AS row_num
+                    FROM notification_history
+                    WHERE Customer_ID IN (SELECT value FROM json_each(?))
+                )
+                WHERE row_num <= ?
+                ORDER BY Customer_ID, row_num""", (10,)),
+            ('actions', """
+                SELECT * FROM recommended_actions
+                WHERE Customer_ID IN (SELECT value FROM json_each(?))
+                ORDER BY Customer_ID, rowid""", ())
+        ]
+        
+        for section, query, extra_params in sections:
+            cursor = self.conn.execute(query, (ids,) + extra_params)
+            columns = [desc[0] for desc in cursor.description]
+            # The window queries add row_num, which the per-customer profile does not have
+            keep = len(columns) - 1 if columns[-1] == 'row_num' else len(columns)
+            columns = columns[:keep]
+            customer_id_index = columns.index('Customer_ID')
+            
+            for row in cursor.fetchall():
+                record = dict(zip(columns, row[:keep]))
+                profile = profiles[row[customer_id_index]]
+                if section in ('basic', 'activity'):
+                    profile[section] = record
+                else:
+                    profile.setdefault(section, []).append(record)
+        
+        return profiles
+    
     def get_all_customer_ids(self):
         """Get all customer IDs from the database"""
         cursor = self.conn.execute("SELECT Customer_ID FROM customer_profiles")
         return [row[0] for row in cursor.fetchall()]
     
+    def get_unclassified_customer_ids(self):
+        """Customers still needing a segment: never classified, or marked dirty by an incremental ingest"""
+        self.conn.execute(DIRTY_TABLE_SQL)
+        cursor = self.conn.execute("""
+            SELECT Customer_ID FROM customer_profiles
+            WHERE customer_segment IS NULL
+               OR Customer_ID IN (SELECT Customer_ID FROM customer_dirty)
+            ORDER BY Customer_ID
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    
     def add_segment_column(self):
         """Add customer_segment column to customer_profiles table"""
         try:
@@ -130,27 +632,122 @@ class DatabaseManager:
         except sqlite3.OperationalError:
             print("ℹ️ customer_segment column already exists")
     
+    def migrate_to_typed_schema(self):
+        """Copy a database created by the old pandas to_sql import into the typed TABLE_SCHEMAS tables
+        
+        Existing rows, including customer segments, are kept. Does nothing if the
+        tables already have primary keys.
+        """
+        primary_keys = [row[5] for row in self.conn.execute("PRAGMA table_info(customer_profiles)")]
+        if any(primary_keys):
+            print("ℹ️ Database already uses the typed schema")
+            return
+        
+        self.add_segment_column()
+        self.add_timestamp_columns()
+        
+        for table_name in TABLE_SCHEMAS:
+            self.conn.execute(f"ALTER TABLE {table_name} RENAME TO legacy_{table_name}")
+        for index_name, in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall():
+            self.conn.execute(f"DROP INDEX {index_name}")
+        
+        for table_name, table_sql in TABLE_SCHEMAS.items():
+            self.conn.execute(table_sql)
+            columns = ', '.join(
+                f"[{row[1]}]" for row in self.conn.execute(f"PRAGMA table_info(legacy_{table_name})")
+            )
+            condition = ''
+            if table_name in REQUIRED_TIMESTAMP_TABLES:
+                condition = f"WHERE [{TIMESTAMP_COLUMNS[table_name][1]}] IS NOT NULL"
+            copied = self.conn.execute(
+                f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM legacy_{table_name} {condition} ORDER BY rowid"
+            ).rowcount
+            legacy_rows = self.conn.execute(f"SELECT COUNT(*) FROM legacy_{table_name}").fetchone()[0]
+            self._report_skipped_timestamps(table_name, legacy_rows - copied)
+        
+        for table_name in reversed(list(TABLE_SCHEMAS)):
+            self.conn.execute(f"DROP TABLE legacy_{table_name}")
+        
+        self.conn.commit()
+        self.create_indexes()
+        self.conn.execute("VACUUM")
+        print("✅ Migrated tables to the typed schema")
+        bump_data_version(self.db_path)
+    
+    def add_timestamp_columns(self):
+        """Add and fill normalized timestamp columns on a database created before they existed"""
+        added = False
+        for table_name, (source_column, timestamp_column) in TIMESTAMP_COLUMNS.items():
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")]
+            if timestamp_column in columns:
+                continue
+            
+            self.conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {timestamp_column} TEXT")
+            rows = pd.read_sql_query(f"SELECT rowid, [{source_column}] AS source FROM {table_name}", self.conn)
+            rows['normalized'] = normalize_timestamps(rows['source'])
+            self.conn.executemany(
+                f"UPDATE {table_name} SET {timestamp_column} = ? WHERE rowid = ?",
+                zip(rows['normalized'], rows['rowid'].tolist())
+            )
+            print(f"✅ Added {timestamp_column} to '{table_name}'")
+            added = True
+        
+        # The composite timestamp indexes replace the single-column Customer_ID ones
+        self.conn.execute("DROP INDEX IF EXISTS idx_interaction_customer_id")
+        self.conn.execute("DROP INDEX IF EXISTS idx_notification_customer_id")
+        self.create_indexes()
+        if added:
+            bump_data_version(self.db_path)
+    
     def update_customer_segment(self, customer_id, segment):
         """Update customer segment classification"""
-        self.conn.execute(
-            "UPDATE customer_profiles SET customer_segment = ? WHERE Customer_ID = ?",
-            (segment, customer_id)
-        )
-        self.conn.commit()
+        self.update_customer_segments([(customer_id, segment)])
+    
+    def update_customer_segments(self, segments):
+        """Write many segment results and clear their dirty markers in one transaction
+        
+        segments is a {customer_id: segment} dict or an iterable of (customer_id, segment)
+        pairs. They are staged in a temp table and applied with a single UPDATE ... FROM,
+        so a batch costs one statement and one commit however large it is.
+        """
+        pairs = segments.items() if isinstance(segments, dict) else segments
+        try:
+            self.conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS staged_segments (
+                Customer_ID INTEGER PRIMARY KEY,
+                customer_segment TEXT NOT NULL
+            )
+            """)
+            self.conn.execute("DELETE FROM temp.staged_segments")
+            self.conn.executemany("INSERT OR REPLACE INTO temp.staged_segments VALUES (?, ?)", pairs)
+            self.conn.execute("""
+            UPDATE customer_profiles SET customer_segment = staged.customer_segment
+            FROM temp.staged_segments AS staged
+            WHERE customer_profiles.Customer_ID = staged.Customer_ID
+            """)
+            self.conn.execute("DELETE FROM customer_dirty WHERE Customer_ID IN (SELECT Customer_ID FROM temp.staged_segments)")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        bump_data_version(self.db_path)
     
     def close(self):
         """Close database connection"""
         self.conn.close()
 
 class CustomerSegmentClassifier:
-    def __init__(self):
-        """Initialize Bedrock client for AI classification"""
+    def __init__(self, cache=None):
+        """Initialize Bedrock client for AI classification
+        
+        cache, an AIResponseCache, stores each AI-classified segment under a
+        fingerprint of its prompt so unchanged customers are not asked about again.
+        """
+        self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+        self.cache = cache
+        self.rules = RuleBasedSegmentClassifier()
         try:
-            self.bedrock_client = boto3.client(
-                'bedrock-runtime',
-                region_name='us-east-1'
-            )
-            self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+            self.bedrock_client = get_bedrock_client()
             print("✅ Bedrock client initialized")
         except Exception as e:
             print(f"⚠️ Bedrock client not available: {e}")
@@ -158,38 +755,46 @@ class CustomerSegmentClassifier:
     
     def classify_customer_segment(self, customer_profile):
         """Use AI to classify customer into one of four segments"""
+        segment = self.classify_with_model(customer_profile)
+        if segment is None:
+            segment = self.fallback_segments([customer_profile])[0]
+        return segment
+    
+    def classify_with_model(self, customer_profile):
+        """Ask Bedrock for the customer's segment, or return None if the model is unavailable or fails"""
         if not self.bedrock_client:
-            return self._fallback_classification(customer_profile)
+            return None
         
         try:
             prompt = self._build_classification_prompt(customer_profile)
-            
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 100,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-            
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=body
-            )
-            
-            response_body = json.loads(response['body'].read())
-            ai_response = response_body['content'][0]['text'].strip()
+            ai_response = invoke_text_model(self.bedrock_client, self.model_id, prompt,
+                                            max_tokens=CLASSIFICATION_MAX_TOKENS)
             
             # Extract segment from AI response
             segment = self._parse_segment_response(ai_response)
+            
+            # Fallback answers are never cached, so a later run retries the model
+            if self.cache is not None:
+                self.cache.put(self._cache_key(prompt), segment)
             return segment
             
         except Exception as e:
             print(f"AI classification error: {e}")
-            return self._fallback_classification(customer_profile)
+            return None
+    
+    def cached_segments(self, customer_profiles):
+        """Segments cached for these profiles, in order, with None for each miss"""
+        if self.cache is None:
+            return [None] * len(customer_profiles)
+        
+        cache_keys = [self._cache_key(self._build_classification_prompt(profile)) for profile in customer_profiles]
+        found = self.cache.get_many(cache_keys)
+        return [found.get(cache_key) for cache_key in cache_keys]
+    
+    def _cache_key(self, prompt):
+        """Fingerprint of everything the prompt reads from the profile, plus the prompt version"""
+        return AIResponseCache.make_key(self.model_id, prompt, CLASSIFICATION_MAX_TOKENS,
+                                        namespace=f'segment-v{CLASSIFICATION_PROMPT_VERSION}')
     
     def _build_classification_prompt(self, profile):
         """Build prompt for AI customer segment classification"""
@@ -284,65 +889,196 @@ Respond with ONLY the segment name: VALUE SEEKERS, TRADITIONALISTS, DIGITAL NATI
             else:
                 return "Value Seekers"  # Default fallback
     
-    def _fallback_classification(self, profile):
-        """Fallback classification when AI is not available"""
-        basic = profile.get('basic', {})
-        activity = profile.get('activity', {})
+    def fallback_segments(self, profiles):
+        """Rule-based segments for profiles the model could not classify, in one columnar pass"""
+        if not profiles:
+            return []
         
-        age = basic.get('Age', 50)
-        income = basic.get('Income_Bracket', 'Medium')
-        channel = basic.get('Preferred_Channel', 'Email')
-        subscription = activity.get('Subscription_Type', 'Basic')
+        features = pd.DataFrame([{
+            'Age': profile.get('basic', {}).get('Age', 50),
+            'Income_Bracket': profile.get('basic', {}).get('Income_Bracket', 'Medium'),
+            'Preferred_Channel': profile.get('basic', {}).get('Preferred_Channel', 'Email'),
+            'Subscription_Type': profile.get('activity', {}).get('Subscription_Type', 'Basic')
+        } for profile in profiles])
+        return self.rules.classify(features)['segment'].tolist()
+
+class RuleBasedSegmentClassifier:
+    """Columnar segmentation rules evaluated over whole tables at once
+    
+    Each segment has a signal; the first segment in SEGMENT_RULE_ORDER whose signal
+    fires wins, exactly like the original if/else fallback. Rows where no signal or
+    several competing signals fire are flagged ambiguous, so hybrid mode can send
+    only those to the LLM.
+    """
+    
+    SEGMENT_RULE_ORDER = ["Eco Savers", "Traditionalists", "Digital Natives", "Value Seekers"]
+    DEFAULT_SEGMENT = "Value Seekers"
+    
+    def load_features(self, conn, customer_ids):
+        """Read the columns the rules use for the given customers"""
+        return pd.read_sql_query("""
+            SELECT cp.Customer_ID, cp.Age, cp.Income_Bracket, cp.Preferred_Channel, aa.Subscription_Type
+            FROM customer_profiles cp
+            LEFT JOIN account_activity aa ON aa.Customer_ID = cp.Customer_ID
+            WHERE cp.Customer_ID IN (SELECT value FROM json_each(?))
+            ORDER BY cp.Customer_ID
+        """, conn, params=(json.dumps(list(customer_ids)),))
+    
+    def signals(self, features):
+        """Boolean Series per segment saying whether its rule fires for each row"""
+        age = pd.to_numeric(features['Age'], errors='coerce')
+        channel = features['Preferred_Channel']
+        income = features['Income_Bracket']
+        subscription = features['Subscription_Type']
         
-        # Simple rule-based classification
-        if subscription == 'Green':
-            return "Eco Savers"
-        elif age >= 60 or channel == 'Phone':
-            return "Traditionalists"
-        elif channel == 'App Push' or subscription == 'Premium':
-            return "Digital Natives"
-        elif income == 'Low' or subscription == 'Basic':
-            return "Value Seekers"
-        else:
-            return "Value Seekers"  # Default
+        return {
+            "Eco Savers": subscription.eq('Green'),
+            "Traditionalists": age.ge(60) | channel.eq('Phone'),
+            "Digital Natives": channel.eq('App Push') | subscription.eq('Premium'),
+            "Value Seekers": income.eq('Low') | subscription.eq('Basic')
+        }
+    
+    def classify(self, features):
+        """Return features with 'segment' and 'ambiguous' columns added"""
+        signals = self.signals(features)
+        conditions = [signals[segment].to_numpy() for segment in self.SEGMENT_RULE_ORDER]
+        
+        result = features.copy()
+        result['segment'] = np.select(conditions, self.SEGMENT_RULE_ORDER, default=self.DEFAULT_SEGMENT)
+        result['ambiguous'] = np.sum(conditions, axis=0) != 1
+        return result
+
+def classify_customers(db, classifier, customer_ids, workers=CLASSIFICATION_WORKERS,
+                       chunk_size=CLASSIFICATION_CHUNK_SIZE):
+    """Classify customers chunk by chunk with a worker pool, committing each chunk's segments
+    
+    Profiles for a chunk are loaded in bulk and its results written in one transaction,
+    so an interrupted run keeps every finished chunk and can resume from the rest.
+    Returns segment counts.
+    """
+    segment_counts = {"Value Seekers": 0, "Traditionalists": 0, "Digital Natives": 0, "Eco Savers": 0}
+    total = len(customer_ids)
+    classified = 0
+    started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for start in range(0, total, chunk_size):
+            chunk_ids = customer_ids[start:start + chunk_size]
+            profiles = db.get_customer_profiles(chunk_ids)
+            chunk_profiles = [profiles[customer_id] for customer_id in chunk_ids]
+            
+            # Only customers whose prompt inputs changed since they were last classified go to the model
+            chunk_segments = classifier.cached_segments(chunk_profiles)
+            misses = [index for index, segment in enumerate(chunk_segments) if segment is None]
+            
+            # Bedrock calls are I/O bound, so threads share the one client
+            classified_misses = executor.map(classifier.classify_with_model,
+                                             [chunk_profiles[index] for index in misses])
+            for index, segment in zip(misses, classified_misses):
+                chunk_segments[index] = segment
+            
+            # Whatever the model could not classify goes through the rules together
+            failed = [index for index in misses if chunk_segments[index] is None]
+            for index, segment in zip(failed, classifier.fallback_segments([chunk_profiles[index] for index in failed])):
+                chunk_segments[index] = segment
+            
+            segments = dict(zip(chunk_ids, chunk_segments))
+            db.update_customer_segments(segments)
+            
+            for segment in segments.values():
+                segment_counts[segment] += 1
+            classified += len(chunk_ids)
+            
+            elapsed = time.perf_counter() - started
+            rate = classified / elapsed if elapsed else 0.0
+            remaining = (total - classified) / rate if rate else 0.0
+            print(f"📊 Classified {classified}/{total} customers ({rate:.1f}/sec, ~{remaining:.0f}s remaining)")
+    
+    return segment_counts
+
+def classify_customers_with_rules(db, customer_ids, hybrid=False):
+    """Segment customers with the vectorised rules and write the results in bulk
+    
+    In hybrid mode rows the rules flag as ambiguous are left unclassified. Returns
+    (customer IDs still needing the LLM, segment counts).
+    """
+    started = time.perf_counter()
+    rules = RuleBasedSegmentClassifier()
+    result = rules.classify(rules.load_features(db.conn, customer_ids))
+    
+    decided = result[~result['ambiguous']] if hybrid else result
+    db.update_customer_segments(dict(zip(decided['Customer_ID'].tolist(), decided['segment'].tolist())))
+    
+    segment_counts = {segment: 0 for segment in RuleBasedSegmentClassifier.SEGMENT_RULE_ORDER}
+    segment_counts.update(decided['segment'].value_counts().to_dict())
+    llm_customer_ids = result.loc[result['ambiguous'], 'Customer_ID'].tolist() if hybrid else []
+    
+    print(f"⚡ Rules classified {len(decided)} customers in {time.perf_counter() - started:.2f}s"
+          + (f", {len(llm_customer_ids)} ambiguous customers left for the LLM" if hybrid else ""))
+    return llm_customer_ids, segment_counts
 
-def main():
-    """Main function to set up database and classify customers"""
+def main(db_path='customer_data.db', data_dir='user_data', incremental=False, resume=False,
+         workers=CLASSIFICATION_WORKERS, chunk_size=CLASSIFICATION_CHUNK_SIZE, mode=CLASSIFICATION_MODE,
+         use_segment_cache=True):
+    """Main function to set up database and classify customers
+    
+    With incremental=True the existing database is updated with only the CSV rows
+    that changed, and only the affected customers are reclassified. With resume=True
+    the data is left as it is and an interrupted classification run carries on.
+    
+    mode picks the classifier: 'llm' asks Bedrock about every customer, 'rules' uses
+    only the vectorised rules and 'hybrid' uses the rules and asks Bedrock only
+    about the customers they find ambiguous.
+    
+    With use_segment_cache, AI-classified segments are kept in segment_cache.db
+    next to the database and reused while a customer's prompt inputs are unchanged.
+    """
     print("🚀 Starting database setup and customer classification...")
     
     # Initialize database
-    db = DatabaseManager()
+    db = DatabaseManager(db_path)
     
-    # Create tables from CSV files
-    db.create_tables_from_csvs()
+    if resume:
+        print("⏯️ Resuming classification of customers without a current segment")
+    elif incremental:
+        # Apply CSV changes; customers left dirty by earlier runs are picked up too
+        db.ingest_csvs_incrementally(data_dir)
+    else:
+        # Create tables from CSV files
+        db.create_tables_from_csvs(data_dir)
     
     # Add segment column
     db.add_segment_column()
     
-    # Initialize classifier
-    classifier = CustomerSegmentClassifier()
+    # Unclassified customers are everyone after a rebuild, or just the dirty ones
+    customer_ids = db.get_unclassified_customer_ids()
     
-    # Get all customers
-    customer_ids = db.get_all_customer_ids()
-    print(f"📊 Found {len(customer_ids)} customers to classify")
+    print(f"📊 Found {len(customer_ids)} customers to classify ({mode} mode)")
     
-    # Classify each customer
-    segment_counts = {"Value Seekers": 0, "Traditionalists": 0, "Digital Natives": 0, "Eco Savers": 0}
+    segment_counts = {segment: 0 for segment in RuleBasedSegmentClassifier.SEGMENT_RULE_ORDER}
+    if mode in ('rules', 'hybrid'):
+        customer_ids, segment_counts = classify_customers_with_rules(db, customer_ids, hybrid=mode == 'hybrid')
     
-    for customer_id in customer_ids:
-        print(f"🔍 Analysing Customer {customer_id}...")
+    if customer_ids:
+        segment_cache = None
+        if use_segment_cache:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), SEGMENT_CACHE_FILE)
+            segment_cache = AIResponseCache(cache_path, ttl_seconds=SEGMENT_CACHE_TTL_SECONDS,
+                                            max_entries=SEGMENT_CACHE_MAX_ENTRIES)
         
-        # Get complete profile
-        profile = db.get_customer_complete_profile(customer_id)
+        # Initialize classifier
+        classifier = CustomerSegmentClassifier(cache=segment_cache)
         
-        # Classify using AI
-        segment = classifier.classify_customer_segment(profile)
+        print(f"🤖 Classifying {len(customer_ids)} customers with AI ({workers} workers, chunks of {chunk_size})")
+        llm_counts = classify_customers(db, classifier, customer_ids, workers, chunk_size)
+        for segment, count in llm_counts.items():
+            segment_counts[segment] += count
         
-        # Update database
-        db.update_customer_segment(customer_id, segment)
-        
-        segment_counts[segment] += 1
-        print(f"✅ Customer {customer_id} classified as: {segment}")
+        if segment_cache:
+            cache_stats = segment_cache.stats()
+            print(f"💾 Segment cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.1%} hit rate)")
+            segment_cache.close()
     
     print("\n📈 Classification Summary:")
     for segment, count in segment_counts.items():
@@ -350,9 +1086,29 @@ def main():
     
     print(f"\n🎯 Value Seekers identified: {segment_counts['Value Seekers']} customers")
     
+    # Markers left now belong to customers deleted since they were marked
+    db.clear_dirty_customers()
+    
     # Close database
     db.close()
     print("✅ Database setup complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Create the customer database from CSVs and classify customers')
+    parser.add_argument('--db-path', default='customer_data.db')
+    parser.add_argument('--data-dir', default='user_data')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Apply only changed CSV rows and reclassify only the affected customers')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip ingest and classify only customers an interrupted run did not finish')
+    parser.add_argument('--mode', choices=CLASSIFICATION_MODES, default=CLASSIFICATION_MODE,
+                        help='llm: Bedrock for everyone; rules: vectorised rules only; hybrid: Bedrock only for ambiguous customers')
+    parser.add_argument('--no-segment-cache', action='store_true',
+                        help='Ask the model about every customer instead of reusing cached segments')
+    parser.add_argument('--workers', type=int, default=CLASSIFICATION_WORKERS, help='Concurrent classification requests')
+    parser.add_argument('--chunk-size', type=int, default=CLASSIFICATION_CHUNK_SIZE,
+                        help='Customers loaded, classified and committed together')
+    args = parser.parse_args()
+    main(db_path=args.db_path, data_dir=args.data_dir, incremental=args.incremental, resume=args.resume,
+         workers=args.workers, chunk_size=args.chunk_size, mode=args.mode,
+         use_segment_cache=not args.no_segment_cache)
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Pool of SQLite connections shared by Flask request threads and notification
+workers. Connections are opened on demand up to a fixed limit and tuned for
+read-heavy work; read-only pools open the file with mode=ro, and WAL
+journaling lets them keep reading while database_setup.py writes.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', '16'))
+# Page cache per connection in KiB, and how much of the file each connection may memory-map
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '32768'))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+# How long a connection waits on a lock held by a writer before raising "database is locked"
+SQLITE_BUSY_TIMEOUT_SECONDS = 5.0
+
+def enable_wal(db_path):
+    """Switch the database file to WAL journaling and return the resulting mode
+
+    The setting is stored in the file, so it only needs to happen once per database.
+    """
+    conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        conn.close()
+
+class SQLiteConnectionPool:
+    """Hands out one connection per concurrent user, blocking when all max_connections are busy"""
+
+    def __init__(self, db_path, max_connections=SQLITE_POOL_SIZE, read_only=True,
+                 cache_size_kb=SQLITE_CACHE_SIZE_KB, mmap_size=SQLITE_MMAP_SIZE):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._connections = []
+        self._lock = threading.Lock()
+
+        enable_wal(db_path)
+
+    def _connect(self):
+        if self.read_only:
+            uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+            conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kb}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the with-block"""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+
+            try:
+                yield conn
+            finally:
+                # Never hand the next borrower an open transaction (or a stale read snapshot)
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every connection the pool has opened"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._idle = queue.LifoQueue()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AWS Bedrock runtime used for offline development and load testing
+
+Speaks the invoke_model request/response shape for Anthropic models and returns
+templated PRIORITY/URGENCY/RISK_SCORE analyses, segment classifications and
+engagement messages derived from the prompt, with configurable latency,
+throttling and error rates.
+
+Usage:
+    python mock_bedrock_server.py --port 8010 --latency-ms 800 --throttle-rate 0.05
+    BEDROCK_ENDPOINT_URL=http://localhost:8010 python app.py
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_DISTRIBUTIONS = ['fixed', 'uniform', 'normal', 'lognormal']
+
+class MockBedrockBehaviour:
+    """Latency, throttling and error settings plus request counters, shared by all handler threads"""
+
+    def __init__(self, latency_ms=800, latency_jitter_ms=200, latency_distribution='lognormal',
+                 throttle_rate=0.0, error_rate=0.0, requests_per_minute=0, seed=None):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_distribution = latency_distribution
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self._random = random.Random(seed)
+        self._recent_requests = deque()
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'errors': 0}
+
+    def sample_latency(self):
+        """Seconds to wait before responding"""
+        mean = self.latency_ms
+        jitter = self.latency_jitter_ms
+        with self._lock:
+            if self.latency_distribution == 'fixed' or mean <= 0:
+                value = mean
+            elif self.latency_distribution == 'uniform':
+                value = self._random.uniform(mean - jitter, mean + jitter)
+            elif self.latency_distribution == 'normal':
+                value = self._random.gauss(mean, jitter)
+            else:
+                # Lognormal with the requested mean and standard deviation: long tail like real model calls
+                variance = (jitter / mean) ** 2
+                sigma = math.sqrt(math.log(1 + variance))
+                mu = math.log(mean) - sigma ** 2 / 2
+                value = self._random.lognormvariate(mu, sigma)
+        return max(0.0, value) / 1000.0
+
+    def next_outcome(self):
+        """Decide whether this request succeeds, is throttled or fails"""
+        now = time.monotonic()
+        with self._lock:
+            self.stats['requests'] += 1
+
+            if self.requests_per_minute:
+                while self._recent_requests and now - self._recent_requests[0] > 60:
+                    self._recent_requests.popleft()
+                if len(self._recent_requests) >= self.requests_per_minute:
+                    self.stats['throttled'] += 1
+                    return 'throttled'
+                self._recent_requests.append(now)
+
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                self.stats['throttled'] += 1
+                return 'throttled'
+            if roll < self.throttle_rate + self.error_rate:
+                self.stats['errors'] += 1
+                return 'error'
+
+            self.stats['ok'] += 1
+            return 'ok'
+
+    def snapshot(self):
+        """Current request counters"""
+        with self._lock:
+            return dict(self.stats)
+
+def _extract_int(pattern, text, default):
+    """First integer captured by pattern, or default"""
+    match = re.search(pattern, text)
+    return int(match.group(1)) if match else default
+
+def _priority_analysis(profile_text):
+    """Templated priority analysis derived from one customer's profile section"""
+    churn_risk = _extract_int(r'Churn Risk Score: (\d+)%', profile_text, 50)
+    satisfaction = _extract_int(r'Current Satisfaction Score: (\d+)/10', profile_text, 5)
+    engagement = _extract_int(r'Engagement Score: (\d+)/100', profile_text, 50)
+    unresolved = _extract_int(r'Service Issues: (\d+) unresolved issues', profile_text, 0)
+
+    if churn_risk > 70 or satisfaction < 3 or unresolved > 1:
+        priority, urgency = 'HIGH', 'IMMEDIATE' if churn_risk > 85 else 'WITHIN_24H'
+    elif churn_risk > 40 or engagement < 30:
+        priority, urgency = 'MEDIUM', 'WITHIN_WEEK'
+    else:
+        priority, urgency = 'LOW', 'ROUTINE'
+
+    risk_score = max(1, min(10, round(churn_risk / 10 + (5 - satisfaction) / 5)))
+
+    return f"""PRIORITY: {priority}
+URGENCY: {urgency}
+RISK_SCORE: {risk_score}
+CONTACT_REASON: Churn risk of {churn_risk}% with satisfaction {satisfaction}/10 needs a proactive value conversation
+TRIGGER_FACTORS: Churn risk {churn_risk}% + satisfaction score {satisfaction}/10 + engagement score {engagement} + {unresolved} unresolved issues
+POTENTIAL_IMPACT: Customer may switch supplier if their cost concerns are not addressed
+CUSTOMER_INSIGHTS: Price-conscious and practical, responds to clear savings
+COMMUNICATION_STYLE: Direct and empathetic
+CONVERSATION_STARTERS: We wanted to make sure you are on the best tariff for your usage"""
+
+def _segment_classification(prompt):
+    """Templated segment classification mirroring the rule-based fallback"""
+    age = _extract_int(r'- Age: (\d+)', prompt, 50)
+    channel = re.search(r'- Preferred Channel: (.+)', prompt)
+    subscription = re.search(r'- Subscription Type: (.+)', prompt)
+    channel = channel.group(1).strip() if channel else ''
+    subscription = subscription.group(1).strip() if subscription else ''
+
+    if subscription == 'Green':
+        return 'ECO SAVERS'
+    if age >= 60 or channel == 'Phone':
+        return 'TRADITIONALISTS'
+    if channel == 'App Push' or subscription == 'Premium':
+        return 'DIGITAL NATIVES'
+    return 'VALUE SEEKERS'
+
+def _engagement_message(prompt):
+    """Templated engagement message addressed to the customer's first name"""
+    match = re.search(r'Customer: (\S+)', prompt)
+    first_name = match.group(1) if match else 'there'
+    return (f"Hi {first_name}, your next ScottishPower bill is due soon. "
+            "Here are some simple ways to keep your energy costs down this month.")
+
+def build_response_text(prompt):
+    """Pick a templated answer for the kind of prompt the app sent"""
+    if '### CUSTOMER <ID> START ###' in prompt:
+        sections = re.split(r'(?==== CUSTOMER PROFILE: )', prompt)
+        blocks = []
+        for section in sections:
+            customer_id = re.search(r'=== CUSTOMER PROFILE: .* \(ID: (\d+)\) ===', section)
+            if customer_id:
+                blocks.append(f"### CUSTOMER {customer_id.group(1)} START ###\n"
+                              f"{_priority_analysis(section)}\n"
+                              f"### CUSTOMER {customer_id.group(1)} END ###")
+        return "\n\n".join(blocks)
+
+    if 'PRIORITY: [HIGH/MEDIUM/LOW]' in prompt:
+        return _priority_analysis(prompt)
+
+    if 'Classify this customer into ONE of these four segments' in prompt:
+        return _segment_classification(prompt)
+
+    return _engagement_message(prompt)
+
+class MockBedrockHandler(BaseHTTPRequestHandler):
+    """Handles POST /model/<modelId>/invoke and GET /stats"""
+
+    behaviour = None
+
+    def do_POST(self):
+        match = re.match(r'^/model/([^/]+)/invoke$', self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        raw_body = self.rfile.read(length)
+
+        if not match:
+            return self._send_json(404, {'message': f'Unknown path {self.path}'}, 'ResourceNotFoundException')
+
+        try:
+            request_body = json.loads(raw_body)
+            prompt = request_body['messages'][0]['content']
+            max_tokens = int(request_body.get('max_tokens', 200))
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            return self._send_json(400, {'message': f'Malformed request: {e}'}, 'ValidationException')
+
+        time.sleep(self.behaviour.sample_latency())
+        outcome = self.behaviour.next_outcome()
+
+        if outcome == 'throttled':
+            return self._send_json(429, {'message': 'Too many requests, please wait before trying again.'},
+                                   'ThrottlingException')
+        if outcome == 'error':
+            return self._send_json(500, {'message': 'Mock internal server error'}, 'InternalServerException')
+
+        text = build_response_text(prompt)
+        self._send_json(200, {
+            'id': f'msg_{uuid.uuid4().hex[:24]}',
+            'type': 'message',
+            'role': 'assistant',
+            'model': match.group(1),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {
+                'input_tokens': len(prompt) // 4,
+                'output_tokens': min(max_tokens, len(text) // 4)
+            }
+        })
+
+    def do_GET(self):
+        if self.path == '/stats':
+            return self._send_json(200, self.behaviour.snapshot())
+        self._send_json(404, {'message': f'Unknown path {self.path}'}, 'ResourceNotFoundException')
+
+    def _send_json(self, status, payload, error_type=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if error_type:
+            self.send_header('x-amzn-ErrorType', error_type)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet; use /stats for counters
+        pass
+
+class MockBedrockServer:
+    """Threaded mock server that can run in the background of a test or benchmark"""
+
+    def __init__(self, host='127.0.0.1', port=0, **behaviour_options):
+        self.behaviour = MockBedrockBehaviour(**behaviour_options)
+        handler = type('BoundMockBedrockHandler', (MockBedrockHandler,), {'behaviour': self.behaviour})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the AWS Bedrock runtime invoke_model API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--latency-ms', type=float, default=800, help='Mean response latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=200, help='Spread (standard deviation or half-range)')
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with ThrottlingException')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500 error')
+    parser.add_argument('--requests-per-minute', type=int, default=0, help='Throttle above this sliding-window rate (0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockBedrockServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_distribution=args.latency_distribution,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        requests_per_minute=args.requests_per_minute,
+        seed=args.seed
+    )
+
+    print(f"🧪 Mock Bedrock listening on {server.endpoint_url}")
+    print(f"   Latency: {args.latency_distribution} {args.latency_ms}ms ± {args.latency_jitter_ms}ms | "
+          f"Throttle: {args.throttle_rate:.0%} | Errors: {args.error_rate:.0%} | RPM limit: {args.requests_per_minute or 'none'}")
+    print(f"   Run the app with: BEDROCK_ENDPOINT_URL={server.endpoint_url} python app.py")
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock Bedrock stopped")
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
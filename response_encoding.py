@@ -0,0 +1,95 @@
+"""
+Wire encoding of API responses: a Flask JSON provider backed by orjson when it
+is installed, and negotiated gzip/brotli compression of large JSON bodies.
+orjson is listed in requirements.txt; brotli is optional. Both degrade
+gracefully: without them responses are stdlib JSON, gzip-compressed.
+"""
+import gzip
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 'orjson' (when installed) or 'stdlib'
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+# Bodies smaller than this are sent as they are; compression would barely help
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+# Brotli quality 5 compresses better than gzip -6 at a similar speed
+BROTLI_QUALITY = 5
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialises with orjson, keeping Flask's sorted keys and date format; anything orjson rejects goes to the stdlib
+
+    Unlike the stdlib, orjson writes NaN and infinity as null, which keeps the output valid JSON.
+    """
+
+    # Flask pretty-prints in debug mode unless compact is set, and indented output needs the stdlib
+    compact = True
+    # Datetimes go through Flask's default hook, so they stay HTTP dates as with the stdlib
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+              | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        # An explicit indent asks for pretty printing, which orjson cannot match exactly
+        if kwargs.get('indent') is None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+def configure_json(app, provider=JSON_PROVIDER):
+    """Install the fast JSON provider on app if requested and available; returns the provider name"""
+    if provider == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+        return 'orjson'
+    return 'stdlib'
+
+def available_encodings():
+    """Content codings this process can produce, best first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(data, encoding):
+    """Compress bytes with a content coding from available_encodings()"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def compress_response(response, accept_encodings):
+    """Compress a large, buffered JSON response with the best coding the client accepts
+
+    accept_encodings is the request's parsed Accept-Encoding header. Streamed
+    responses such as Server-Sent Events are left alone so events still flush
+    one at a time.
+    """
+    if response.status_code == 304:
+        # The cached representation may have been compressed
+        response.vary.add('Accept-Encoding')
+        return response
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = next((coding for coding in available_encodings() if accept_encodings[coding]), None)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
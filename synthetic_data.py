@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Synthetic customer data generator for load testing and benchmarks
+
+Writes the five CSV files that database_setup.py ingests, at any number of
+customers. Every column follows the schema and value distribution of the
+shipped samples in user_data/: categorical columns are drawn with their
+observed frequencies, numeric columns uniformly within their observed range
+and timestamps uniformly between the earliest and latest sample.
+
+Usage:
+    python synthetic_data.py --customers 100000 --output-dir /tmp/sne_100k
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from database_setup import CSV_FILES
+
+# Columns generated as sequences rather than sampled
+ID_COLUMNS = {'Customer_ID', 'Notification_ID'}
+
+# Customers written per chunk, bounding memory for very large runs
+CHUNK_CUSTOMERS = 100000
+
+class ColumnSampler:
+    """Draws values for one column following the distribution of a sample column"""
+
+    def __init__(self, series):
+        self.kind = 'categorical'
+        values = series.dropna()
+
+        if pd.api.types.is_numeric_dtype(series):
+            self.kind = 'integer'
+            self.low, self.high = int(values.min()), int(values.max())
+        elif values.str.fullmatch(r'[A-Z]-\d+').all():
+            # Identifiers such as Agent_ID "A-257"
+            self.kind = 'code'
+            self.prefix = values.iloc[0].split('-')[0]
+            numbers = values.str.split('-').str[1].astype(int)
+            self.low, self.high = int(numbers.min()), int(numbers.max())
+        elif values.str.fullmatch(r'\d{4}-\d{2}-\d{2}( \d{2}:\d{2})?').all():
+            self.kind = 'timestamp'
+            self.format = '%Y-%m-%d %H:%M' if ':' in values.iloc[0] else '%Y-%m-%d'
+            parsed = pd.to_datetime(values)
+            self.low, self.high = parsed.min().value, parsed.max().value
+
+        if self.kind == 'categorical':
+            # Keep missing values (e.g. no Action_Taken) at their observed rate
+            frequencies = series.value_counts(dropna=False, normalize=True)
+            self.choices = frequencies.index.to_numpy(dtype=object)
+            self.probabilities = frequencies.to_numpy()
+
+    def sample(self, rng, size):
+        if self.kind == 'integer':
+            return rng.integers(self.low, self.high + 1, size)
+        if self.kind == 'code':
+            return np.char.add(f'{self.prefix}-', rng.integers(self.low, self.high + 1, size).astype(str))
+        if self.kind == 'timestamp':
+            timestamps = pd.to_datetime(rng.integers(self.low, self.high + 1, size))
+            return timestamps.strftime(self.format)
+        return rng.choice(self.choices, size=size, p=self.probabilities)
+
+class SyntheticDataGenerator:
+    """Scales the sample CSVs in template_dir up to any number of customers"""
+
+    def __init__(self, template_dir='user_data', seed=None, interactions_per_customer=3,
+                 notifications_per_customer=3, actions_per_customer=1):
+        self.rng = np.random.default_rng(seed)
+        self.rows_per_customer = {
+            'customer_profiles': 1,
+            'account_activity': 1,
+            'interaction_history': interactions_per_customer,
+            'notification_history': notifications_per_customer,
+            'recommended_actions': actions_per_customer
+        }
+        self.templates = {}
+        self.samplers = {}
+
+        for table_name, file_name in CSV_FILES.items():
+            template = pd.read_csv(os.path.join(template_dir, file_name))
+            self.templates[table_name] = template
+            self.samplers[table_name] = {
+                column: ColumnSampler(template[column])
+                for column in template.columns if column not in ID_COLUMNS
+            }
+
+    def generate_table(self, table_name, customer_ids, first_row_number=0):
+        """Build one table's rows for the given customers"""
+        template = self.templates[table_name]
+        rows = len(customer_ids) * self.rows_per_customer[table_name]
+        data = {}
+
+        for column in template.columns:
+            if column == 'Customer_ID':
+                data[column] = np.repeat(customer_ids, self.rows_per_customer[table_name])
+            elif column == 'Notification_ID':
+                first_id = int(template[column].str.split('-').str[1].min())
+                data[column] = [f'N-{first_id + first_row_number + i}' for i in range(rows)]
+            else:
+                data[column] = self.samplers[table_name][column].sample(self.rng, rows)
+
+        return pd.DataFrame(data, columns=template.columns)
+
+    def write_csvs(self, output_dir, customers, first_customer_id=3000):
+        """Write all five CSV files for `customers` customers and return row counts per table"""
+        os.makedirs(output_dir, exist_ok=True)
+        row_counts = {table_name: 0 for table_name in CSV_FILES}
+
+        for start in range(0, customers, CHUNK_CUSTOMERS):
+            customer_ids = np.arange(
+                first_customer_id + start,
+                first_customer_id + min(start + CHUNK_CUSTOMERS, customers)
+            )
+            for table_name, file_name in CSV_FILES.items():
+                frame = self.generate_table(table_name, customer_ids, row_counts[table_name])
+                frame.to_csv(
+                    os.path.join(output_dir, file_name),
+                    mode='w' if start == 0 else 'a',
+                    header=start == 0,
+                    index=False
+                )
+                row_counts[table_name] += len(frame)
+
+        return row_counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic customer CSVs matching user_data/')
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--template-dir', default='user_data')
+    parser.add_argument('--interactions-per-customer', type=int, default=3)
+    parser.add_argument('--notifications-per-customer', type=int, default=3)
+    parser.add_argument('--actions-per-customer', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    generator = SyntheticDataGenerator(
+        template_dir=args.template_dir,
+        seed=args.seed,
+        interactions_per_customer=args.interactions_per_customer,
+        notifications_per_customer=args.notifications_per_customer,
+        actions_per_customer=args.actions_per_customer
+    )
+    row_counts = generator.write_csvs(args.output_dir, args.customers)
+
+    print(f"✅ Wrote synthetic data for {args.customers} customers to {args.output_dir}")
+    for table_name, rows in row_counts.items():
+        print(f"  {table_name}: {rows} rows")
+
+if __name__ == '__main__':
+    main()
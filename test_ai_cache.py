@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the persistent AI response cache: keys, expiry, batch lookups and eviction
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_cache
+from ai_cache import AIResponseCache
+
+MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+def cached_keys(cache):
+    return {row[0] for row in cache.conn.execute("SELECT cache_key FROM ai_response_cache")}
+
+def test_cache_keys():
+    """The key changes with the model, token limit, prompt and namespace, and nothing else"""
+
+    print("🔍 TESTING AI CACHE KEYS")
+    print("=" * 50)
+
+    key = AIResponseCache.make_key(MODEL_ID, 'Classify customer 3001', 1000)
+    assert key == AIResponseCache.make_key(MODEL_ID, 'Classify customer 3001', 1000)
+    variants = [
+        AIResponseCache.make_key('anthropic.claude-3-sonnet-20240229-v1:0', 'Classify customer 3001', 1000),
+        AIResponseCache.make_key(MODEL_ID, 'Classify customer 3001', 500),
+        AIResponseCache.make_key(MODEL_ID, 'Classify customer 3002', 1000),
+        AIResponseCache.make_key(MODEL_ID, 'Classify customer 3001', 1000, namespace='priority'),
+    ]
+    assert len({key, *variants}) == 5
+    print("  ✅ Model id, max_tokens, prompt and namespace each give a different key")
+
+def test_ttl_and_get_many():
+    """Expired entries are misses for get and get_many, fresh ones are hits"""
+
+    print("🔍 TESTING AI CACHE EXPIRY AND BATCH LOOKUP")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = AIResponseCache(os.path.join(temp_dir, 'cache.db'), ttl_seconds=60)
+        fresh = AIResponseCache.make_key(MODEL_ID, 'fresh', 100)
+        stale = AIResponseCache.make_key(MODEL_ID, 'stale', 100)
+        missing = AIResponseCache.make_key(MODEL_ID, 'missing', 100)
+        cache.put(fresh, 'fresh response')
+        cache.put(stale, 'stale response')
+        cache.conn.execute(
+            "UPDATE ai_response_cache SET created_at = ? WHERE cache_key = ?", (time.time() - 61, stale)
+        )
+        cache.conn.commit()
+
+        assert cache.get(fresh) == 'fresh response'
+        assert cache.get(stale) is None
+        assert cache.get(missing) is None
+        print("  ✅ get returns fresh entries and misses expired ones")
+
+        # Duplicate keys are looked up once but counted per request
+        found = cache.get_many([fresh, stale, missing, fresh])
+        assert found == {fresh: 'fresh response'}
+        assert cache.stats() == {'hits': 3, 'misses': 4, 'hit_rate': 0.429}
+        print("  ✅ get_many returns only fresh hits and counts each requested key")
+
+        # More keys than fit in one SELECT
+        keys = [AIResponseCache.make_key(MODEL_ID, f'prompt {i}', 100) for i in range(ai_cache.LOOKUP_BATCH_SIZE + 10)]
+        for index, cache_key in enumerate(keys):
+            cache.put(cache_key, f'response {index}')
+        found = cache.get_many(keys)
+        assert found == {cache_key: f'response {index}' for index, cache_key in enumerate(keys)}
+        print(f"  ✅ get_many found all {len(keys)} keys across {ai_cache.LOOKUP_BATCH_SIZE}-key batches")
+
+        cache.close()
+
+def test_eviction():
+    """Every EVICTION_INTERVAL writes, expired entries go and only the most recently used remain"""
+
+    print("🔍 TESTING AI CACHE EVICTION")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = AIResponseCache(os.path.join(temp_dir, 'cache.db'), ttl_seconds=3600, max_entries=3)
+        keys = [AIResponseCache.make_key(MODEL_ID, f'prompt {i}', 100) for i in range(ai_cache.EVICTION_INTERVAL)]
+
+        for cache_key in keys[:-1]:
+            cache.put(cache_key, 'response')
+        assert len(cached_keys(cache)) == ai_cache.EVICTION_INTERVAL - 1
+        print(f"  ✅ No eviction before the {ai_cache.EVICTION_INTERVAL}th write")
+
+        # Give every entry an old, distinct access time, then use two of them again
+        base = time.time() - 600
+        cache.conn.executemany(
+            "UPDATE ai_response_cache SET last_accessed = ? WHERE cache_key = ?",
+            [(base + index, cache_key) for index, cache_key in enumerate(keys[:-1])]
+        )
+        # This one is recently used but expired, so it goes regardless
+        cache.conn.execute(
+            "UPDATE ai_response_cache SET created_at = ?, last_accessed = ? WHERE cache_key = ?",
+            (time.time() - 7200, time.time(), keys[50])
+        )
+        cache.conn.commit()
+        assert cache.get(keys[0]) == 'response'
+        assert cache.get(keys[1]) == 'response'
+
+        cache.put(keys[-1], 'response')
+        assert cached_keys(cache) == {keys[0], keys[1], keys[-1]}
+        print("  ✅ Expired entry dropped and the 3 most recently used kept")
+
+        cache.close()
+
+if __name__ == "__main__":
+    test_cache_keys()
+    test_ttl_and_get_many()
+    test_eviction()
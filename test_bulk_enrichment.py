@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test that bulk enrichment matches the per-customer history queries
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import SmartNotificationEngine, app
+
+def test_bulk_enrichment_matches_per_customer_queries():
+    """Bulk-loaded histories should have the same shape and content as the per-customer helpers"""
+    
+    print("🔍 TESTING BULK CUSTOMER ENRICHMENT")
+    print("=" * 50)
+    
+    engine = SmartNotificationEngine('customer_data.db')
+    customers = engine.get_opted_in_value_seekers()
+    
+    print(f"✅ Found {len(customers)} customers")
+    
+    for customer in customers:
+        customer_id = customer['Customer_ID']
+        
+        assert customer['interactions'] == engine._get_recent_interactions(customer_id)
+        assert customer['notification_history'] == engine._get_notification_history(customer_id)
+        assert customer['recommended_actions'] == engine._get_recommended_actions(customer_id)
+        
+        print(f"  ✅ Customer {customer_id}: {len(customer['interactions'])} interactions, "
+              f"{len(customer['notification_history'])} notifications, "
+              f"{len(customer['recommended_actions'])} actions")
+
+def test_value_seeker_summary_matches_customer_list():
+    """SQL aggregates should agree with counts and averages over the full customer list"""
+    
+    print("🔍 TESTING VALUE SEEKER SUMMARY AGGREGATES")
+    print("=" * 50)
+    
+    engine = SmartNotificationEngine('customer_data.db')
+    customers = engine.get_opted_in_value_seekers()
+    summary = engine.get_value_seeker_summary()
+    
+    assert summary['total_count'] == len(customers)
+    assert round(summary['avg_age'], 6) == round(sum(c['Age'] for c in customers) / len(customers), 6)
+    assert round(summary['avg_churn_risk'], 6) == round(sum(c['Churn_Risk_Score'] for c in customers) / len(customers), 6)
+    
+    for key, column in [('subscription_breakdown', 'Subscription_Type'),
+                        ('location_breakdown', 'Location'),
+                        ('income_breakdown', 'Income_Bracket')]:
+        expected = {}
+        for customer in customers:
+            expected[customer[column]] = expected.get(customer[column], 0) + 1
+        assert summary[key] == expected, key
+    
+    print(f"✅ Summary of {summary['total_count']} customers matches the customer list")
+    
+    # Without the optional columns, every customer is charted as 'None'
+    assert summary['billing_anomaly_breakdown'] == {'None': len(customers)}
+    assert summary['ownership_breakdown'] == {'None': len(customers)}
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'customers.db')
+        shutil.copy('customer_data.db', db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute("ALTER TABLE customer_profiles ADD COLUMN Billing_Anomaly TEXT")
+        conn.execute("ALTER TABLE account_activity ADD COLUMN Solar_EV_Ownership TEXT")
+        conn.execute("UPDATE customer_profiles SET Billing_Anomaly = 'Overcharge' WHERE Customer_ID = ?",
+                     (customers[0]['Customer_ID'],))
+        conn.execute("UPDATE account_activity SET Solar_EV_Ownership = 'Solar'")
+        conn.commit()
+        conn.close()
+        
+        temp_engine = SmartNotificationEngine(db_path)
+        summary = temp_engine.get_value_seeker_summary()
+        temp_engine.close()
+        assert summary['billing_anomaly_breakdown'] == {'None': len(customers) - 1, 'Overcharge': 1}
+        assert summary['ownership_breakdown'] == {'Solar': len(customers)}
+    print("✅ Billing anomaly and ownership breakdowns cover every customer")
+
+def test_customer_pages_match_full_list():
+    """Keyset pages should cover the full list once, projected and filtered in SQL"""
+    
+    print("🔍 TESTING PAGINATED CUSTOMER QUERIES")
+    print("=" * 50)
+    
+    engine = SmartNotificationEngine('customer_data.db')
+    customers = engine.get_opted_in_value_seekers()
+    
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = engine.get_customers_page(after=cursor, limit=2)
+        pages.extend(page)
+        if cursor is None:
+            break
+    assert pages == customers
+    print(f"✅ {len(pages)} customers across pages of 2")
+    
+    page, _ = engine.get_customers_page(fields=['Name'], filters={'min_churn_risk': '60'})
+    expected = [c for c in customers if c['Churn_Risk_Score'] >= 60]
+    assert page == [{'Customer_ID': c['Customer_ID'], 'Name': c['Name']} for c in expected]
+    print(f"✅ {len(page)} customers with churn risk of at least 60, projected to Name")
+
+def test_customers_endpoint_parameters():
+    """Unrelated query parameters are ignored and format=list keeps the bare array"""
+    
+    print("🔍 TESTING /api/customers PARAMETERS")
+    print("=" * 50)
+    
+    client = app.test_client()
+    
+    envelope = client.get('/api/customers?_=1712345678&limit=2').get_json()
+    assert envelope == client.get('/api/customers?limit=2').get_json()
+    assert client.get('/api/customers?min_churn_risk=high').status_code == 400
+    print("✅ Cache-buster parameter ignored; malformed filter values still rejected")
+    
+    customers = SmartNotificationEngine('customer_data.db').get_opted_in_value_seekers()
+    response = client.get('/api/customers?format=list')
+    assert response.get_json() == customers
+    assert 'X-Next-Cursor' not in response.headers
+    
+    response = client.get('/api/customers?format=list&limit=2')
+    assert response.get_json() == customers[:2]
+    assert response.headers['X-Next-Cursor'] == str(envelope['next_cursor'])
+    print(f"✅ format=list returned all {len(customers)} customers as a bare array")
+
+if __name__ == "__main__":
+    test_bulk_enrichment_matches_per_customer_queries()
+    test_value_seeker_summary_matches_customer_list()
+    test_customer_pages_match_full_list()
+    test_customers_endpoint_parameters()
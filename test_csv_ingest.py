@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that a full CSV rebuild loads in chunks and never leaves the database empty
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from database_setup import CSV_FILES, TABLE_SCHEMAS, DatabaseManager
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    counts = {table_name: conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+              for table_name in TABLE_SCHEMAS}
+    conn.close()
+    return counts
+
+def test_chunked_rebuild_and_failed_rebuild():
+    """Small chunks load every row, pragmas are restored, and a failed rebuild keeps the old tables"""
+
+    print("🔍 TESTING CHUNKED CSV REBUILD")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for file_name in CSV_FILES.values():
+            shutil.copy(os.path.join('user_data', file_name), data_dir)
+        db_path = os.path.join(data_dir, 'customers.db')
+
+        db = DatabaseManager(db_path)
+        db.conn.execute("PRAGMA journal_mode = WAL")
+        synchronous = db.conn.execute("PRAGMA synchronous").fetchone()[0]
+
+        # Chunks of 7 rows split every 25-row sample file unevenly
+        db.create_tables_from_csvs(data_dir, chunk_rows=7)
+        expected = {table_name: len(pd.read_csv(os.path.join(data_dir, file_name)))
+                    for table_name, file_name in CSV_FILES.items()}
+        assert table_counts(db_path) == expected
+        print(f"  ✅ Chunked load stored {sum(expected.values())} rows across {len(expected)} tables")
+
+        assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == synchronous
+        assert not db.conn.in_transaction
+        print("  ✅ Journal mode untouched and synchronous restored")
+
+        # A constraint violation in the last table fails the whole rebuild
+        actions_path = os.path.join(data_dir, CSV_FILES['recommended_actions'])
+        actions = pd.read_csv(actions_path, dtype=str, keep_default_na=False)
+        actions.loc[0, 'Urgency_Level'] = 'Extreme'
+        actions.to_csv(actions_path, index=False)
+        profiles_path = os.path.join(data_dir, CSV_FILES['customer_profiles'])
+        profiles = pd.read_csv(profiles_path, dtype=str, keep_default_na=False)
+        profiles.iloc[:5].to_csv(profiles_path, index=False)
+
+        try:
+            db.create_tables_from_csvs(data_dir, chunk_rows=7)
+            assert False, "invalid Urgency_Level was accepted"
+        except sqlite3.IntegrityError:
+            pass
+        assert table_counts(db_path) == expected
+        assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == synchronous
+        print("  ✅ Failed rebuild rolled back to the previous tables")
+
+        db.close()
+
+if __name__ == "__main__":
+    test_chunked_rebuild_and_failed_rebuild()
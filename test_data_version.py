@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test that database writes bump the data version used for HTTP caching
+"""
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.http import http_date
+import app as app_module
+from data_version import bump_data_version, read_data_version, version_path
+from database_setup import DatabaseManager
+
+def test_segment_updates_bump_data_version():
+    """Each bump should be visible to readers straight away, including segment writes"""
+
+    print("🔍 TESTING DATA VERSION SIDECAR")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'customers.db')
+        db = DatabaseManager(db_path)
+        db.create_schema()
+
+        version, _ = read_data_version(db_path)
+        assert version == 0
+
+        # Back-to-back bumps must not be hidden by the reader's cache
+        assert bump_data_version(db_path) == 1
+        assert read_data_version(db_path)[0] == 1
+        assert bump_data_version(db_path) == 2
+        assert read_data_version(db_path)[0] == 2
+        print("  ✅ Consecutive bumps read back as 1 and 2")
+
+        db.conn.execute("INSERT INTO customer_profiles (Customer_ID, Name, Opted_In) VALUES (3000, 'Test Customer', 'Yes')")
+        db.conn.commit()
+        db.update_customer_segments({3000: 'Value Seekers'})
+        assert read_data_version(db_path)[0] == 3
+        print("  ✅ Segment update bumped the version to 3")
+
+        db.close()
+
+def write_data_version(db_path, version, updated_at):
+    """Put a known version and change time in the sidecar"""
+    with open(version_path(db_path), 'w') as f:
+        json.dump({'version': version, 'updated_at': updated_at}, f)
+
+def test_conditional_requests():
+    """Read endpoints answer 304 while the data version is unchanged and 200 after a bump"""
+
+    print("🔍 TESTING CONDITIONAL API REQUESTS")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'customers.db')
+        shutil.copy('customer_data.db', db_path)
+        engine = app_module.SmartNotificationEngine(db_path)
+        original_engine = app_module.notification_engine
+        app_module.notification_engine = engine
+        client = app_module.app.test_client()
+        try:
+            changed_at = int(time.time()) - 60 + 0.25
+            write_data_version(db_path, 1, changed_at)
+
+            response = client.get('/api/value-seekers')
+            assert response.status_code == 200
+            etag = response.headers['ETag']
+            last_modified = response.headers['Last-Modified']
+            assert etag.startswith('W/')
+            assert last_modified == http_date(int(changed_at) + 1)
+            assert 'no-cache' in response.headers['Cache-Control']
+            print(f"  ✅ 200 with ETag {etag} and Last-Modified {last_modified}")
+
+            response = client.get('/api/value-seekers', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.data == b''
+            assert response.headers['ETag'] == etag
+            print("  ✅ Matching If-None-Match answered with an empty 304")
+
+            response = client.get('/api/value-seekers', headers={'If-Modified-Since': last_modified})
+            assert response.status_code == 304
+            print("  ✅ If-Modified-Since without an ETag answered with 304")
+
+            # A date in the same second as the change cannot prove the client has it
+            response = client.get('/api/value-seekers', headers={'If-Modified-Since': http_date(int(changed_at))})
+            assert response.status_code == 200
+            print("  ✅ If-Modified-Since in the same second as the change answered with 200")
+
+            bump_data_version(db_path)
+            response = client.get('/api/value-seekers', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+            # The new change happened this second, so no Last-Modified a later change could collide with
+            assert 'Last-Modified' not in response.headers
+            response = client.get('/api/value-seekers', headers={'If-Modified-Since': last_modified})
+            assert response.status_code == 200
+            print("  ✅ Old validators answered with 200 after a bump")
+
+            response = client.get('/api/customers?limit=0', headers={'If-None-Match': etag})
+            assert response.status_code == 400
+            assert 'ETag' not in response.headers
+            assert 'Last-Modified' not in response.headers
+            assert response.cache_control.no_cache is None
+            print("  ✅ Error response sent without caching headers")
+        finally:
+            app_module.notification_engine = original_engine
+            engine.close()
+
+if __name__ == "__main__":
+    test_segment_updates_bump_data_version()
+    test_conditional_requests()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test that pooled read-only connections read concurrently while a writer commits
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_setup import CSV_FILES, DatabaseManager
+from db_pool import SQLiteConnectionPool
+
+def test_read_only_pool_reads_during_writes():
+    """Readers should see committed rows while a write transaction is open, and never write"""
+
+    print("🔍 TESTING SQLITE CONNECTION POOL")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'pool.db')
+        writer = sqlite3.connect(db_path)
+        writer.execute("CREATE TABLE customers (Customer_ID INTEGER PRIMARY KEY)")
+        writer.executemany("INSERT INTO customers VALUES (?)", [(i,) for i in range(100)])
+        writer.commit()
+
+        pool = SQLiteConnectionPool(db_path, max_connections=4)
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+        # An open write transaction must not block readers in WAL mode
+        writer.execute("INSERT INTO customers VALUES (100)")
+        counts = []
+        errors = []
+
+        def read():
+            try:
+                with pool.connection() as conn:
+                    counts.append(conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors
+        assert counts == [100] * 12
+        print(f"  ✅ {len(counts)} concurrent reads during an open write transaction")
+
+        writer.commit()
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == 101
+            try:
+                conn.execute("DELETE FROM customers")
+                assert False, "read-only connection accepted a write"
+            except sqlite3.OperationalError:
+                print("  ✅ Read-only connection rejected a write")
+
+        assert len(pool._connections) <= 4
+        pool.close()
+        writer.close()
+
+def test_full_rebuild_while_pool_connection_checked_out():
+    """A full database_setup rebuild must succeed while the app holds pooled connections"""
+
+    print("🔍 TESTING REBUILD DURING POOLED READS")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for file_name in CSV_FILES.values():
+            shutil.copy(os.path.join('user_data', file_name), data_dir)
+        db_path = os.path.join(data_dir, 'customers.db')
+
+        db = DatabaseManager(db_path)
+        db.create_tables_from_csvs(data_dir)
+        pool = SQLiteConnectionPool(db_path, max_connections=2)
+
+        # One connection idle in the pool, one checked out mid-read
+        with pool.connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM customer_profiles").fetchone()
+        with pool.connection() as conn:
+            conn.execute("BEGIN")
+            before = conn.execute("SELECT COUNT(*) FROM customer_profiles").fetchone()[0]
+            db.create_tables_from_csvs(data_dir)
+            # The reader's snapshot is unaffected by the rebuild
+            assert conn.execute("SELECT COUNT(*) FROM customer_profiles").fetchone()[0] == before
+
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM customer_profiles").fetchone()[0] == before
+            assert conn.execute("SELECT COUNT(*) FROM notification_history").fetchone()[0] > 0
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        print(f"  ✅ Rebuild finished during pooled reads; {before} customers still served")
+
+        pool.close()
+        db.close()
+
+if __name__ == "__main__":
+    test_read_only_pool_reads_during_writes()
+    test_full_rebuild_while_pool_connection_checked_out()
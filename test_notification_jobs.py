@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test background notification jobs and their progress and results endpoints
+"""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import NotificationJobManager
+
+NOTIFICATIONS = [
+    {'customer_id': 3010, 'priority': 'Medium', 'risk_score': 40},
+    {'customer_id': 3001, 'priority': 'High', 'risk_score': 70},
+    {'customer_id': 3004, 'priority': 'High', 'risk_score': 85}
+]
+
+class SteppedEngine:
+    """Stands in for SmartNotificationEngine and pauses after two customers until released"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.halfway = threading.Event()
+        self.release = threading.Event()
+
+    def generate_notifications(self, on_progress=None):
+        total = len(NOTIFICATIONS)
+        on_progress(0, total, None)
+        for processed, notification in enumerate(NOTIFICATIONS, 1):
+            if processed == 3:
+                self.halfway.set()
+                assert self.release.wait(5)
+                if self.fail:
+                    raise RuntimeError('Bedrock unavailable')
+            on_progress(processed, total, notification)
+        return app_module.notification_engine.sort_notifications(NOTIFICATIONS)
+
+def wait_for_status(client, job_id, status):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        body = client.get(f'/api/notification-jobs/{job_id}').get_json()
+        if body['status'] == status:
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+def run_with_engine(engine, check):
+    original_jobs = app_module.notification_jobs
+    app_module.notification_jobs = NotificationJobManager(engine)
+    try:
+        check(app_module.app.test_client())
+    finally:
+        engine.release.set()
+        app_module.notification_jobs = original_jobs
+
+def test_job_progress_and_results():
+    """Polling with ?since=N returns only new partial results; /results returns the sorted list"""
+
+    print("🔍 TESTING NOTIFICATION JOBS")
+    print("=" * 50)
+
+    engine = SteppedEngine()
+
+    def check(client):
+        response = client.post('/api/notification-jobs')
+        assert response.status_code == 202
+        job = response.get_json()
+        assert job['status_url'] == f"/api/notification-jobs/{job['job_id']}"
+        assert engine.halfway.wait(5)
+
+        status = client.get(job['status_url']).get_json()
+        assert status['status'] == 'running'
+        assert (status['processed'], status['total'], status['partial_count']) == (2, 3, 2)
+        assert status['partial_results'] == NOTIFICATIONS[:2]
+        assert client.get(f"{job['status_url']}?since=1").get_json()['partial_results'] == NOTIFICATIONS[1:2]
+        print("  ✅ Partial results while running, and ?since=1 skips the first one")
+
+        response = client.get(job['results_url'])
+        assert response.status_code == 202
+        assert 'partial_results' not in response.get_json()
+        print("  ✅ /results answers 202 with progress until the job finishes")
+
+        engine.release.set()
+        status = wait_for_status(client, job['job_id'], 'completed')
+        assert status['processed'] == 3 and status['completed_at']
+        assert client.get(f"{job['status_url']}?since=2").get_json()['partial_results'] == NOTIFICATIONS[2:]
+
+        response = client.get(job['results_url'])
+        assert response.status_code == 200
+        assert [n['customer_id'] for n in response.get_json()] == [3004, 3001, 3010]
+        print("  ✅ /results returns the notifications sorted by priority and risk")
+
+    run_with_engine(engine, check)
+
+def test_failed_and_unknown_jobs():
+    """A failed run reports its error, and unknown job ids are 404"""
+
+    print("🔍 TESTING FAILED AND UNKNOWN NOTIFICATION JOBS")
+    print("=" * 50)
+
+    engine = SteppedEngine(fail=True)
+
+    def check(client):
+        for url in ['/api/notification-jobs/not-a-job', '/api/notification-jobs/not-a-job/results']:
+            response = client.get(url)
+            assert response.status_code == 404
+            assert 'not-a-job' in response.get_json()['error']
+        print("  ✅ Unknown job id returns 404 for status and results")
+
+        job = client.post('/api/notification-jobs').get_json()
+        engine.release.set()
+        status = wait_for_status(client, job['job_id'], 'failed')
+        assert status['error'] == 'Bedrock unavailable'
+        assert status['partial_count'] == 2
+        response = client.get(job['results_url'])
+        assert response.status_code == 500
+        assert response.get_json() == {'error': 'Bedrock unavailable'}
+        print("  ✅ Failed job keeps its partial results and /results returns the error")
+
+    run_with_engine(engine, check)
+
+if __name__ == "__main__":
+    test_job_progress_and_results()
+    test_failed_and_unknown_jobs()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the Server-Sent Events notification stream against a stubbed model
+"""
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import BedrockNotificationGenerator, SmartNotificationEngine
+
+# Priority and risk per opted-in Value Seeker; 3024 is rated low and skipped
+ANALYSES = {
+    3001: ('high', 7),
+    3003: ('high', 9),
+    3004: ('high', 7),
+    3010: ('high', 9),
+    3024: ('low', 2)
+}
+
+def stub_analyse_customer_priority(self, customer_data):
+    customer_id = customer_data['Customer_ID']
+    # Earlier customers finish last, so completion order differs from the final order
+    time.sleep((3030 - customer_id) * 0.002)
+    priority, risk_score = ANALYSES[customer_id]
+    return {'priority': priority, 'urgency': 'within_24h', 'risk_score': risk_score}
+
+def stub_generate_engagement_message(self, customer_data, priority_analysis, message_type):
+    return f"Hello {customer_data['Name']}"
+
+def parse_events(body):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for message in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+def test_stream_events_and_order():
+    """Each customer yields a notification or progress event, and complete carries the sorted order"""
+
+    print("🔍 TESTING NOTIFICATION STREAM")
+    print("=" * 50)
+
+    originals = (BedrockNotificationGenerator.analyse_customer_priority,
+                 BedrockNotificationGenerator.generate_engagement_message,
+                 app_module.notification_engine)
+    BedrockNotificationGenerator.analyse_customer_priority = stub_analyse_customer_priority
+    BedrockNotificationGenerator.generate_engagement_message = stub_generate_engagement_message
+    engine = SmartNotificationEngine('customer_data.db', max_workers=4, use_ai_cache=False)
+    app_module.notification_engine = engine
+    try:
+        response = app_module.app.test_client().get('/api/notifications/stream')
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        events = parse_events(response.get_data(as_text=True))
+
+        names = [name for name, _ in events]
+        assert names[0] == 'progress' and events[0][1] == {'processed': 0, 'total': 5}
+        assert names[-1] == 'complete'
+        assert names.count('notification') == 4 and names.count('progress') == 2
+        assert [data['processed'] for _, data in events[:-1]] == list(range(6))
+        print(f"  ✅ Events: {', '.join(names)}")
+
+        expected = [n['customer_id'] for n in engine.generate_notifications()]
+        assert expected == [3003, 3010, 3001, 3004]
+        streamed = [data['notification']['customer_id'] for name, data in events if name == 'notification']
+        assert sorted(streamed) == sorted(expected)
+        print(f"  ✅ Notifications streamed in completion order {streamed}")
+
+        assert events[-1][1] == {'total': 4, 'order': expected}
+        print(f"  ✅ complete order {expected} matches generate_notifications")
+    finally:
+        (BedrockNotificationGenerator.analyse_customer_priority,
+         BedrockNotificationGenerator.generate_engagement_message,
+         app_module.notification_engine) = originals
+        engine.close()
+
+if __name__ == "__main__":
+    test_stream_events_and_order()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test parsing of batched priority responses and the fallback to single calls
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import BedrockNotificationGenerator, SmartNotificationEngine
+
+def analysis_block(customer_id, priority, risk_score):
+    return (f"### CUSTOMER {customer_id} START ###\n"
+            f"PRIORITY: {priority}\nURGENCY: WITHIN_24H\nRISK_SCORE: {risk_score}\n"
+            f"CONTACT_REASON: Billing concerns for {customer_id}\n"
+            f"### CUSTOMER {customer_id} END ###")
+
+def customer(customer_id):
+    return {'Customer_ID': customer_id, 'Name': f'Customer {customer_id}', 'Churn_Risk_Score': 75,
+            'Engagement_Score': 50, 'Satisfaction_Score': 4, 'Account_Tenure_Years': 3,
+            'Preferred_Channel': 'Email', 'Opted_In': 'Yes'}
+
+class StubGenerator(BedrockNotificationGenerator):
+    """Answers batched requests from a fixed response and records every model call"""
+
+    def __init__(self, batch_response):
+        super().__init__()
+        self.batch_response = batch_response
+        self.calls = []
+
+    def _invoke(self, prompt, max_tokens):
+        self.calls.append('batch' if '### CUSTOMER <ID> START ###' in prompt else 'single')
+        if self.calls[-1] == 'batch':
+            if isinstance(self.batch_response, Exception):
+                raise self.batch_response
+            return self.batch_response
+        return "PRIORITY: HIGH\nURGENCY: IMMEDIATE\nRISK_SCORE: 6"
+
+    def generate_engagement_message(self, customer_data, priority_analysis, message_type):
+        return f"Hello {customer_data['Name']}"
+
+def test_split_batch_response():
+    """Only well-formed START/END pairs with matching ids become blocks"""
+
+    print("🔍 TESTING BATCH RESPONSE SPLITTING")
+    print("=" * 50)
+
+    generator = StubGenerator('')
+    response = "\n".join([
+        "Here are the analyses:",
+        analysis_block(3001, 'HIGH', 8),
+        "###CUSTOMER 3003 start###\nPRIORITY: LOW\n### customer 3003 END ###",
+        "### CUSTOMER 3004 START ###\nPRIORITY: MEDIUM\n### CUSTOMER 3010 END ###",
+        "### CUSTOMER 3024 START ###\nPRIORITY: MEDIUM"
+    ])
+    blocks = generator._split_batch_response(response)
+    assert set(blocks) == {'3001', '3003'}
+    assert blocks['3001'].startswith('PRIORITY: HIGH') and blocks['3001'].endswith('for 3001')
+    assert blocks['3003'] == 'PRIORITY: LOW'
+    print("  ✅ Complete blocks found, case and spacing tolerated")
+    print("  ✅ Mismatched END id and a missing END marker ignored")
+
+    assert generator._split_batch_response("PRIORITY: HIGH") == {}
+    print("  ✅ A response without delimiters gives no blocks")
+
+def test_batch_analysis_alignment():
+    """Results follow the batch order; missing, malformed and foreign blocks give None"""
+
+    print("🔍 TESTING BATCHED PRIORITY ANALYSIS")
+    print("=" * 50)
+
+    customers = [customer(3001), customer(3003), customer(3004), customer(3010)]
+    response = "\n".join([
+        analysis_block(3010, 'LOW', 2),
+        analysis_block(9999, 'HIGH', 9),
+        "### CUSTOMER 3003 START ###\nPRIORITY: HIGH\n### CUSTOMER 3004 END ###",
+        analysis_block(3001, 'HIGH', 8),
+        "### CUSTOMER 3004 START ###\nNo analysis available\n### CUSTOMER 3004 END ###"
+    ])
+    generator = StubGenerator(response)
+    results = generator.analyse_customers_priority_batch(customers)
+
+    assert len(results) == 4 and generator.calls == ['batch']
+    assert (results[0]['priority'], results[0]['risk_score']) == ('high', 8)
+    assert (results[3]['priority'], results[3]['risk_score']) == ('low', 2)
+    assert results[1] is None and results[2] is None
+    print("  ✅ Out-of-order blocks matched by id; an id not in the batch is ignored")
+    print("  ✅ Malformed and PRIORITY-less blocks give None")
+
+    engine = SmartNotificationEngine('customer_data.db', use_ai_cache=False)
+    try:
+        notifications = engine.process_customer_batch(generator, customers)
+    finally:
+        engine.close()
+    assert generator.calls == ['batch', 'batch', 'single', 'single']
+    assert [n['customer_id'] if n else None for n in notifications] == [3001, 3003, 3004, None]
+    assert notifications[1]['risk_score'] == 6
+    print("  ✅ Customers without a batched result were analysed with single calls")
+
+def test_failed_batch_falls_back_to_single_calls():
+    """A batch request that raises is retried one customer at a time"""
+
+    print("🔍 TESTING FAILED BATCH FALLBACK")
+    print("=" * 50)
+
+    customers = [customer(3001), customer(3003), customer(3004)]
+    generator = StubGenerator(RuntimeError('ThrottlingException'))
+    engine = SmartNotificationEngine('customer_data.db', use_ai_cache=False)
+    try:
+        notifications = engine.process_customer_batch(generator, customers)
+    finally:
+        engine.close()
+
+    assert generator.calls == ['batch', 'single', 'single', 'single']
+    assert [n['customer_id'] for n in notifications] == [3001, 3003, 3004]
+    assert all(n['priority'] == 'high' for n in notifications)
+    print("  ✅ Every customer in the failed batch got a single-call analysis")
+
+if __name__ == "__main__":
+    test_split_batch_response()
+    test_batch_analysis_alignment()
+    test_failed_batch_falls_back_to_single_calls()
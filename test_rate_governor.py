@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test that the Bedrock rate governor keeps its queue count and budgets honest
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from botocore.exceptions import ClientError
+import bedrock_client
+from bedrock_client import BedrockRateGovernor
+
+class InterruptedSemaphore:
+    """Stand-in concurrency limit whose wait is interrupted"""
+
+    def __init__(self):
+        self.releases = 0
+
+    def acquire(self):
+        raise RuntimeError('interrupted while queued')
+
+    def release(self):
+        self.releases += 1
+
+class ThrottlingClient:
+    """Stand-in Bedrock client that throttles every call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'InvokeModel')
+
+def test_rate_governor_accounting():
+    """Interrupted waits leave the queue, and throttled calls get their budget back"""
+
+    print("🔍 TESTING BEDROCK RATE GOVERNOR")
+    print("=" * 50)
+
+    governor = BedrockRateGovernor(requests_per_minute=600, tokens_per_minute=60000, max_concurrency=1)
+
+    # A caller interrupted while queued must not stay counted as waiting or release a slot it never got
+    semaphore = governor._semaphore
+    governor._semaphore = InterruptedSemaphore()
+    try:
+        with governor.slot(100):
+            assert False, "slot was granted"
+    except RuntimeError:
+        pass
+    assert governor.snapshot()['waiting'] == 0
+    assert governor._semaphore.releases == 0
+    governor._semaphore = semaphore
+    print("  ✅ Interrupted wait left the queue without releasing a slot")
+
+    # Throttled calls refund what they reserved
+    requests_before = governor.request_bucket.tokens
+    tokens_before = governor.token_bucket.tokens
+    original_governor = bedrock_client.governor
+    bedrock_client.governor = governor
+    governor.back_off = lambda seconds=0: None
+    client = ThrottlingClient()
+    try:
+        bedrock_client.invoke_text_model(client, 'model', 'x' * 4000, 100)
+        assert False, "throttling was not raised"
+    except ClientError:
+        pass
+    finally:
+        bedrock_client.governor = original_governor
+
+    assert client.calls == bedrock_client.THROTTLE_RETRIES + 1
+    assert governor.request_bucket.tokens >= requests_before - 0.01
+    assert governor.token_bucket.tokens >= tokens_before - 0.01
+    print(f"  ✅ {client.calls} throttled calls returned their request and token budgets")
+
+if __name__ == "__main__":
+    test_rate_governor_accounting()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test JSON serialisation and Accept-Encoding negotiation of API responses
+"""
+import sys
+import os
+import gzip
+import json
+import math
+from datetime import datetime, timezone
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+import response_encoding
+from response_encoding import OrjsonProvider, compress_response, configure_json
+
+def make_app():
+    """Small app wired like app.py, with a large JSON route and a streamed one"""
+    app = Flask(__name__)
+    configure_json(app)
+
+    @app.after_request
+    def compress_large_responses(response):
+        return compress_response(response, request.accept_encodings)
+
+    @app.route('/large')
+    def large():
+        return jsonify([{'customer_id': i, 'message': 'Save on your energy bill'} for i in range(200)])
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        events = (f"data: {json.dumps({'processed': i})}\n\n" for i in range(200))
+        return Response(events, mimetype='text/event-stream')
+
+    return app
+
+def test_orjson_matches_stdlib_output():
+    """Both providers produce the same JSON, except that orjson writes NaN as null"""
+
+    print("🔍 TESTING ORJSON / STDLIB PARITY")
+    print("=" * 50)
+
+    if response_encoding.orjson is None:
+        print("  ⚠️ orjson not installed, skipping")
+        return
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+
+    payload = {
+        'customer_id': 3001,
+        'name': 'Jörg Ødegård',
+        'priority': None,
+        'opted_in': True,
+        'churn_risk': 72.5,
+        'scores': [3, 0.25],
+        'sent_at': datetime(2025, 9, 19, 22, 36, tzinfo=timezone.utc),
+        'amount': Decimal('12.30'),
+        'breakdown': {'b': 1, 'a': 2},
+        'by_hour': {9: 'morning', 18: 'evening'}
+    }
+    assert json.loads(fast.dumps(payload)) == json.loads(stdlib.dumps(payload))
+    print("  ✅ Same values for strings, numbers, datetimes, decimals and int keys")
+
+    # The stdlib rejects numpy scalars; orjson writes them as the equivalent Python values
+    assert fast.dumps({'scores': [np.int64(3), np.float64(0.25)]}) == '{"scores":[3,0.25]}'
+    print("  ✅ numpy scalars serialised like Python numbers")
+
+    assert json.loads(fast.dumps({'avg': math.nan})) == {'avg': None}
+    assert stdlib.dumps({'avg': math.nan}) == '{"avg": NaN}'
+    print("  ✅ NaN becomes null with orjson (the stdlib writes a bare NaN)")
+
+    # Debug mode must not push every response back to the stdlib for pretty printing
+    app.debug = True
+    app.json = fast
+    with app.app_context():
+        body = app.json.response({'b': 1, 'a': [1, 2]}).get_data(as_text=True)
+    assert body == '{"a":[1,2],"b":1}\n'
+    print("  ✅ Debug-mode responses stay compact and go through orjson")
+
+def test_accept_encoding_negotiation():
+    """Large JSON is compressed only for codings the client accepts; streams never are"""
+
+    print("🔍 TESTING ACCEPT-ENCODING NEGOTIATION")
+    print("=" * 50)
+
+    client = make_app().test_client()
+    expected = client.get('/large').get_data()
+    assert len(expected) >= response_encoding.COMPRESSION_MIN_BYTES
+
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()) == expected
+    print(f"  ✅ gzip: {len(expected):,} bytes sent as {len(response.get_data()):,}")
+
+    if response_encoding.brotli is None:
+        response = client.get('/large', headers={'Accept-Encoding': 'br, gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        print("  ✅ br, gzip without brotli installed falls back to gzip")
+
+    for accept in ['gzip;q=0', 'identity', 'br;q=0, gzip;q=0, identity', None]:
+        headers = {'Accept-Encoding': accept} if accept else {}
+        response = client.get('/large', headers=headers)
+        assert 'Content-Encoding' not in response.headers, accept
+        assert response.get_data() == expected
+        assert 'Accept-Encoding' in response.vary
+    print("  ✅ q=0, identity and a missing header get the uncompressed body")
+
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    print("  ✅ Responses under COMPRESSION_MIN_BYTES are sent as they are")
+
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True).startswith('data: {"processed": 0}\n\n')
+    print("  ✅ Server-Sent Events stream left uncompressed")
+
+if __name__ == "__main__":
+    test_orjson_matches_stdlib_output()
+    test_accept_encoding_negotiation()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test migrating a database created by the old pandas to_sql import to the typed schema
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from data_version import read_data_version
+from database_setup import CSV_FILES, TABLE_SCHEMAS, DatabaseManager
+
+def create_legacy_database(db_path):
+    """Build tables the way the original setup did: untyped to_sql copies of the CSVs, no keys"""
+    conn = sqlite3.connect(db_path)
+    for table_name, file_name in CSV_FILES.items():
+        pd.read_csv(os.path.join('user_data', file_name)).to_sql(table_name, conn, index=False)
+    conn.execute("ALTER TABLE customer_profiles ADD COLUMN customer_segment TEXT")
+    conn.execute("UPDATE customer_profiles SET customer_segment = 'Value Seekers' WHERE Customer_ID % 2 = 1")
+    conn.execute("CREATE INDEX idx_interaction_customer_id ON interaction_history(Customer_ID)")
+    conn.execute("CREATE INDEX idx_notification_customer_id ON notification_history(Customer_ID)")
+    conn.commit()
+    conn.close()
+
+def test_migrate_legacy_database():
+    """Rows and segments survive, and the typed tables get keys, timestamps and Row_Hash indexes"""
+
+    print("🔍 TESTING LEGACY SCHEMA MIGRATION")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, 'customers.db')
+        create_legacy_database(db_path)
+        db = DatabaseManager(db_path)
+        segments_before = db.conn.execute(
+            "SELECT Customer_ID, customer_segment FROM customer_profiles ORDER BY Customer_ID"
+        ).fetchall()
+        assert read_data_version(db_path)[0] == 0
+
+        db.migrate_to_typed_schema()
+
+        for table_name in TABLE_SCHEMAS:
+            rows = db.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            expected = len(pd.read_csv(os.path.join('user_data', CSV_FILES[table_name])))
+            assert rows == expected, (table_name, rows, expected)
+        print("  ✅ Every legacy row copied")
+
+        primary_keys = [row[1] for row in db.conn.execute("PRAGMA table_info(customer_profiles)") if row[5]]
+        assert primary_keys == ['Customer_ID']
+        segments_after = db.conn.execute(
+            "SELECT Customer_ID, customer_segment FROM customer_profiles ORDER BY Customer_ID"
+        ).fetchall()
+        assert segments_after == segments_before
+        print("  ✅ Customer_ID is the primary key and segments are unchanged")
+
+        for table_name in ['interaction_history', 'recommended_actions']:
+            columns = [row[1] for row in db.conn.execute(f"PRAGMA table_info({table_name})")]
+            assert 'Row_Hash' in columns, table_name
+        indexes = {name for name, in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {'idx_interaction_customer_ts', 'idx_interaction_row_hash', 'idx_actions_row_hash'} <= indexes
+        assert 'idx_interaction_customer_id' not in indexes
+        timestamps = db.conn.execute(
+            "SELECT COUNT(*) FROM interaction_history WHERE Interaction_Timestamp IS NOT NULL"
+        ).fetchone()[0]
+        assert timestamps > 0
+        print("  ✅ Timestamp columns filled and the current indexes created")
+
+        # Adding the timestamp columns and the table rewrite each bump the data version
+        assert read_data_version(db_path)[0] == 2
+        print("  ✅ Data version bumped so cached API responses are refreshed")
+
+        # Running it again is a no-op
+        db.migrate_to_typed_schema()
+        db.add_timestamp_columns()
+        assert read_data_version(db_path)[0] == 2
+        db.close()
+
+if __name__ == "__main__":
+    test_migrate_legacy_database()
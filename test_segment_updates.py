@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test batched segment writes: segments stored, dirty markers cleared and the data version bumped
+"""
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_version import read_data_version
+from database_setup import CSV_FILES, DatabaseManager
+
+def test_update_customer_segments():
+    """A chunk's segments land in one commit and only that chunk's dirty markers are cleared"""
+
+    print("🔍 TESTING BATCHED SEGMENT UPDATES")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for file_name in CSV_FILES.values():
+            shutil.copy(os.path.join('user_data', file_name), data_dir)
+        db_path = os.path.join(data_dir, 'customers.db')
+        db = DatabaseManager(db_path)
+        db.create_tables_from_csvs(data_dir)
+        version = read_data_version(db_path)[0]
+
+        # Customers an incremental ingest marked as changed
+        db.conn.executemany("INSERT INTO customer_dirty (Customer_ID) VALUES (?)", [(3000,), (3001,), (3002,)])
+        db.conn.commit()
+
+        db.update_customer_segments({3000: 'Value Seekers', 3001: 'Eco Savers'})
+        segments = dict(db.conn.execute(
+            "SELECT Customer_ID, customer_segment FROM customer_profiles WHERE customer_segment IS NOT NULL"
+        ).fetchall())
+        assert segments == {3000: 'Value Seekers', 3001: 'Eco Savers'}
+        print("  ✅ Segments written for the chunk's customers only")
+
+        dirty = [row[0] for row in db.conn.execute("SELECT Customer_ID FROM customer_dirty")]
+        assert dirty == [3002]
+        assert 3000 not in db.get_unclassified_customer_ids()
+        assert 3002 in db.get_unclassified_customer_ids()
+        print("  ✅ Dirty markers cleared for the chunk; 3002 still waits for classification")
+
+        assert read_data_version(db_path)[0] == version + 1
+        print("  ✅ Data version bumped once for the chunk")
+
+        # Pairs work too, and a later result for the same customer wins
+        db.update_customer_segments([(3002, 'Traditionalists'), (3000, 'Digital Natives'), (3000, 'Eco Savers')])
+        assert db.conn.execute("SELECT customer_segment FROM customer_profiles WHERE Customer_ID = 3000").fetchone()[0] == 'Eco Savers'
+        assert db.conn.execute("SELECT COUNT(*) FROM customer_dirty").fetchone()[0] == 0
+        assert read_data_version(db_path)[0] == version + 2
+
+        # A segment the schema rejects rolls back the whole chunk and leaves the version alone
+        db.conn.execute("INSERT INTO customer_dirty (Customer_ID) VALUES (3003)")
+        db.conn.commit()
+        try:
+            db.update_customer_segments({3003: 'Value Seekers', 3004: 'Big Spenders'})
+            assert False, "invalid segment was accepted"
+        except sqlite3.IntegrityError:
+            pass
+        assert db.conn.execute("SELECT customer_segment FROM customer_profiles WHERE Customer_ID = 3003").fetchone()[0] is None
+        assert [row[0] for row in db.conn.execute("SELECT Customer_ID FROM customer_dirty")] == [3003]
+        assert read_data_version(db_path)[0] == version + 2
+        print("  ✅ A rejected segment rolls back the chunk, keeps its dirty markers and skips the bump")
+
+        db.close()
+
+if __name__ == "__main__":
+    test_update_customer_segments()
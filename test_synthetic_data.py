@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test that synthetic benchmark data matches the schema of the shipped CSVs
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from database_setup import CSV_FILES
+from synthetic_data import SyntheticDataGenerator
+
+def test_synthetic_csvs_match_sample_schema():
+    """Generated CSVs should have the sample columns, values and row counts"""
+    
+    print("🔍 TESTING SYNTHETIC DATA GENERATION")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = SyntheticDataGenerator(seed=7, interactions_per_customer=2)
+        row_counts = generator.write_csvs(output_dir, 50)
+        
+        assert row_counts['customer_profiles'] == 50
+        assert row_counts['interaction_history'] == 100
+        
+        for table_name, file_name in CSV_FILES.items():
+            sample = pd.read_csv(os.path.join('user_data', file_name))
+            synthetic = pd.read_csv(os.path.join(output_dir, file_name))
+            
+            assert list(synthetic.columns) == list(sample.columns)
+            assert len(synthetic) == row_counts[table_name]
+            
+            for column in sample.columns:
+                if sample[column].dtype == object and sample[column].nunique() <= 10:
+                    unexpected = set(synthetic[column].dropna()) - set(sample[column].dropna())
+                    assert not unexpected, f"{table_name}.{column} has unexpected values {unexpected}"
+            
+            print(f"  ✅ {table_name}: {len(synthetic)} rows")
+        
+        profiles = pd.read_csv(os.path.join(output_dir, CSV_FILES['customer_profiles']))
+        assert profiles['Customer_ID'].is_unique
+        assert profiles['Age'].between(30, 70).all()
+
+if __name__ == "__main__":
+    test_synthetic_csvs_match_sample_schema()
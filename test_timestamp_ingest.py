@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test that CSV rows with malformed timestamps are skipped instead of aborting the import
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from database_setup import CSV_FILES, DatabaseManager
+
+def test_malformed_sent_date_is_skipped():
+    """A notification with an unparseable Sent_Date is dropped; the rest of the table loads"""
+
+    print("🔍 TESTING MALFORMED TIMESTAMP INGEST")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for file_name in CSV_FILES.values():
+            shutil.copy(os.path.join('user_data', file_name), data_dir)
+
+        path = os.path.join(data_dir, CSV_FILES['notification_history'])
+        notifications = pd.read_csv(path, dtype=str, keep_default_na=False)
+        notifications.loc[0, 'Sent_Date'] = 'not a date'
+        notifications.loc[1, 'Sent_Date'] = ''
+        notifications.to_csv(path, index=False)
+        bad_ids = set(notifications['Notification_ID'][:2])
+
+        db = DatabaseManager(os.path.join(data_dir, 'customers.db'))
+        db.create_tables_from_csvs(data_dir)
+        stored = {row[0] for row in db.conn.execute("SELECT Notification_ID FROM notification_history")}
+        assert stored == set(notifications['Notification_ID']) - bad_ids
+        print(f"  ✅ Full load kept {len(stored)} notifications and skipped the 2 malformed ones")
+
+        # An incremental run sees the same rows as new each time and skips them again
+        notifications.loc[2, 'Sent_Date'] = '31/31/2025 99:99'
+        notifications.to_csv(path, index=False)
+        db.ingest_csvs_incrementally(data_dir)
+        stored = {row[0] for row in db.conn.execute("SELECT Notification_ID FROM notification_history")}
+        assert notifications['Notification_ID'][2] not in stored
+        assert len(stored) == len(notifications) - 3
+        print("  ✅ Incremental ingest dropped the row whose date became malformed")
+
+        db.close()
+
+if __name__ == "__main__":
+    test_malformed_sent_date_is_skipped()
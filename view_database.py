@@ -154,14 +154,14 @@ def view_specific_customer(customer_id):
             print(f"  {col}: {df.iloc[0][col]}")
     
     print("\n💬 RECENT INTERACTIONS:")
-    df = pd.read_sql_query("SELECT * FROM interaction_history WHERE Customer_ID = ? ORDER BY [Date & Time] DESC LIMIT 3", conn, params=[customer_id])
+    df = pd.read_sql_query("SELECT * FROM interaction_history WHERE Customer_ID = ? ORDER BY Interaction_Timestamp DESC LIMIT 3", conn, params=[customer_id])
     if len(df) > 0:
         print(df.to_string(index=False))
     else:
         print("  No interactions found")
     
     print("\n📧 NOTIFICATION HISTORY:")
-    df = pd.read_sql_query("SELECT * FROM notification_history WHERE Customer_ID = ? ORDER BY Sent_Date DESC LIMIT 3", conn, params=[customer_id])
+    df = pd.read_sql_query("SELECT * FROM notification_history WHERE Customer_ID = ? ORDER BY Sent_Timestamp DESC LIMIT 3", conn, params=[customer_id])
     if len(df) > 0:
         print(df.to_string(index=False))
     else: